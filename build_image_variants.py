@@ -0,0 +1,11 @@
+from config.config import VARIANTS_DIR
+from utils.variants import Image, variants
+
+# Pre-build the resized thumbnail and full-size copies of every asset, so the
+# bot sends those instead of the originals. New submissions are built on
+# upload; rerun this after adding assets by hand. Needs Pillow.
+if Image is None:
+    print("Pillow is not installed: pip install Pillow")
+else:
+    count = variants.build_all()
+    print(f"Built variants for {count} images in {VARIANTS_DIR}")
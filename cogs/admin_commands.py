@@ -14,6 +14,8 @@ from config.config import (
 )
 from config.messages import *
 from data.storage import storage
+from utils.assets import catalog
+from utils.variants import variants
 from utils.helpers import is_valid_image_path
 
 class AdminCommands(commands.Cog):
@@ -34,6 +36,8 @@ class AdminCommands(commands.Cog):
     async def update_stats(self, ctx: commands.Context) -> None:
         """Update tool and boss stats (owner only)."""
         if ctx.author.id == OWNER_ID:
+            # Write pending changes first so the reload doesn't discard them
+            storage.flush()
             storage.load_all()
             await ctx.send("Stats updated successfully!")
         else:
@@ -61,13 +65,15 @@ class AdminCommands(commands.Cog):
             await interaction.response.send_message(ERR_INVALID_PATH, ephemeral=True)
             return
             
-        if storage.get_character_stats(name.casefold()):
+        if storage.peek_character_stats(name.casefold()) is not None:
             await interaction.response.send_message(ERR_CHARACTER_EXISTS, ephemeral=True)
             return
             
         # Save image and create stats
         ext = attachment.filename[attachment.filename.rfind('.'):]
         await attachment.save(Path(IMAGES_DIR) / f"{name.casefold()}{ext}")
+        catalog.characters.add_file(f"{name.casefold()}{ext}")
+        variants.build_soon(Path(IMAGES_DIR) / f"{name.casefold()}{ext}")
         storage.update_character_stats(name.casefold())
         
         await interaction.response.send_message(
@@ -107,9 +113,14 @@ class AdminCommands(commands.Cog):
             
         try:
             print(f'\n{interaction.user.nick} is updating a group: {name} {group}')
-            char_stats = storage.get_character_stats(name.casefold())
+            char_stats = storage.peek_character_stats(name.casefold())
             
-            if char_stats.group != "_unsorted":
+            if char_stats is None:
+                await interaction.response.send_message(
+                    ERR_CHARACTER_NOT_FOUND.format(name=name),
+                    ephemeral=True
+                )
+            elif char_stats.group != "_unsorted":
                 await interaction.response.send_message(
                     ERR_ALREADY_IN_GROUP.format(
                         name=name,
@@ -169,6 +180,8 @@ class AdminCommands(commands.Cog):
             # Save image
             ext = attachment.filename[attachment.filename.rfind('.'):]
             await attachment.save(Path(TOOLS_DIR) / f"{name}{ext}")
+            catalog.items.add_file(f"{name}{ext}")
+            variants.build_soon(Path(TOOLS_DIR) / f"{name}{ext}")
             
             # Create tool stats
             multipliers = {}
@@ -181,12 +194,12 @@ class AdminCommands(commands.Cog):
                         multipliers[char_name] = multiplier
                         print(f'Character {char_name} added with {multiplier}')
                         
-            storage.tool_stats[name] = {
-                "default_multiplier": default,
-                "group": "None",
-                "character_multipliers": multipliers
-            }
-            storage.save_all()
+            storage.update_tool_stats(
+                name,
+                default_multiplier=default,
+                group="None",
+                character_multipliers=multipliers
+            )
             
             await interaction.response.send_message(
                 SUCCESS_TOOL_ADDED.format(name=name),
@@ -4,11 +4,15 @@ from discord import app_commands
 from discord.ext import commands
 from pathlib import Path
 
-from config.config import MAIN_GUILD_ID, IMAGES_DIR, EX_DIR, ASSETS_DIR
+from config.config import MAIN_GUILD_ID, IMAGES_DIR, EX_DIR, ASSETS_DIR, LEADERBOARD_PAGE_SIZE, TRENDING_WINDOWS
 from config.messages import *
 from data.storage import storage
+from data.leaderboard import METRICS
 from game.stats import StatsManager
-from utils.helpers import find_closest_match, get_image_extension
+from utils.assets import catalog
+from utils.media import image_bytes, media
+from utils.variants import variants
+from utils.helpers import find_character, get_image_extension
 from utils.embeds import (
     create_character_stats_embed,
     create_user_stats_embed,
@@ -16,7 +20,11 @@ from utils.embeds import (
     create_highest_rolls_embed,
     create_raid_master_embed,
     create_library_embed,
-    create_top_ten_embed
+    create_top_ten_embed,
+    create_leaderboard_embed,
+    create_groups_embed,
+    create_trending_embed,
+    response_cache
 )
 
 class StatsCommands(commands.Cog):
@@ -54,48 +62,52 @@ class StatsCommands(commands.Cog):
                 if user:
                     print(f"User found: {user.name}")
                     # Display user stats
-                    stats = storage.get_user_stats(arg)
-                    if not stats:
-                        embed = discord.Embed(title=f'{arg}\'s Stats:')
-                        embed.add_field(name=ERR_NO_STATS, value=None)
-                    else:
-                        embed = create_user_stats_embed(
-                            arg,
-                            stats,
-                            str(user.display_avatar)
-                        )
+                    avatar = str(user.display_avatar)
+
+                    def build_user_stats() -> discord.Embed:
+                        stats = storage.peek_user_stats(arg)
+                        if not stats:
+                            embed = discord.Embed(title=f'{arg}\'s Stats:')
+                            embed.add_field(name=ERR_NO_STATS, value=None)
+                            return embed
+                        return create_user_stats_embed(arg, stats, avatar)
+
+                    embed = response_cache.get(
+                        "stats",
+                        ("user", arg, avatar),
+                        storage.version("user_stats"),
+                        build_user_stats
+                    )
                     await ctx.send(embed=embed)
                     
                 else:
                     print(f"Looking for character: {arg}")
                     # Try to find character
-                    closest_match = find_closest_match(
-                        arg.casefold(),
-                        storage.character_stats.keys()
-                    )
+                    closest_match = find_character(arg)
                     
                     if closest_match:
                         print(f"Character found: {closest_match}")
                         stats = storage.get_character_stats(closest_match)
                         
-                        # Try to find the image with any valid extension
+                        # Unrevealed characters show the placeholder image
                         image = None
                         if stats.count == 0:
                             image = Path(IMAGES_DIR) / "q.png"
                         else:
-                            for ext in [".png", ".jpg", ".jpeg", ".gif"]:
-                                test_path = Path(IMAGES_DIR) / f"{closest_match}{ext}"
-                                if test_path.exists():
-                                    image = test_path
-                                    break
+                            image = catalog.characters.path_for(closest_match)
                             
                             if not image:
                                 print(f"Warning: No image found for {closest_match}")
                                 image = Path(IMAGES_DIR) / "q.png"
                             
                         print(f"Using image path: {image}")
-                        embed = create_character_stats_embed(arg, stats, image)
-                        await ctx.send(embed=embed, file=discord.File(image, filename="image.png"))
+                        embed = response_cache.get(
+                            "stats",
+                            ("character", arg, closest_match),
+                            storage.version("character_stats"),
+                            lambda: create_character_stats_embed(arg, stats, image)
+                        )
+                        await media.send_embed(ctx.send, embed, image, thumbnail=True)
                     else:
                         print(f"No character found matching: {arg}")
                         await ctx.send(
@@ -105,56 +117,58 @@ class StatsCommands(commands.Cog):
             else:
                 print("Displaying overall rankings")
                 # Display overall rankings
-                character, count = StatsManager.get_most_common_character()
-                raid_char, raid_wins = StatsManager.get_winningest_raider()
+                def build_rankings():
+                    character, count = StatsManager.get_most_common_character()
+                    raid_char, raid_wins = StatsManager.get_winningest_raider()
+                    # (embed, character to show, or None for a tie)
+                    if isinstance(character, list):
+                        rolls = (create_highest_rolls_embed(character, count, is_tie=True), None)
+                    else:
+                        rolls = (create_highest_rolls_embed(character, count), character)
+                    if isinstance(raid_char, list):
+                        raids = (create_raid_master_embed(", ".join(raid_char), raid_wins), None)
+                    else:
+                        raids = (create_raid_master_embed(raid_char, raid_wins), raid_char)
+                    return rolls, raids
+
+                (embed, character), (raid_embed, raid_char) = response_cache.get(
+                    "stats",
+                    ("All",),
+                    storage.version("character_stats"),
+                    build_rankings
+                )
                 
                 # Most common character(s)
-                if isinstance(character, list):
-                    embed = create_highest_rolls_embed(character, count, is_tie=True)
+                if character is None:
                     embed.set_image(url="attachment://image.png")
                     file = discord.File(Path(ASSETS_DIR) / "dice.png", filename="image.png")
                     await ctx.send(embed=embed, file=file)
                 else:
                     # Find character image
-                    image = None
-                    for ext in [".png", ".jpg", ".jpeg", ".gif"]:
-                        test_path = Path(IMAGES_DIR) / f"{character}{ext}"
-                        if test_path.exists():
-                            image = test_path
-                            break
+                    image = catalog.characters.path_for(character)
                     
                     if not image:
                         print(f"Warning: No image found for {character}")
                         image = Path(ASSETS_DIR) / "q.png"
                     
                     print(f"Using image path for most common: {image}")
-                    embed = create_highest_rolls_embed(character, count)
-                    embed.set_image(url="attachment://image.png")
-                    await ctx.send(embed=embed, file=discord.File(image, filename="image.png"))
+                    await media.send_embed(ctx.send, embed, image)
                 
                 # Most successful raider(s)
-                if isinstance(raid_char, list):
-                    embed = create_raid_master_embed(", ".join(raid_char), raid_wins)
-                    embed.set_image(url="attachment://image.png")
+                if raid_char is None:
+                    raid_embed.set_image(url="attachment://image.png")
                     file = discord.File(Path(ASSETS_DIR) / "raid.png", filename="image.png")
-                    await ctx.send(embed=embed, file=file)
+                    await ctx.send(embed=raid_embed, file=file)
                 else:
                     # Find raider image
-                    image = None
-                    for ext in [".png", ".jpg", ".jpeg", ".gif"]:
-                        test_path = Path(IMAGES_DIR) / f"{raid_char}{ext}"
-                        if test_path.exists():
-                            image = test_path
-                            break
+                    image = catalog.characters.path_for(raid_char)
                     
                     if not image:
                         print(f"Warning: No image found for {raid_char}")
                         image = Path(ASSETS_DIR) / "q.png"
                     
                     print(f"Using image path for raid master: {image}")
-                    embed = create_raid_master_embed(raid_char, raid_wins)
-                    embed.set_image(url="attachment://image.png")
-                    await ctx.send(embed=embed, file=discord.File(image, filename="image.png"))
+                    await media.send_embed(ctx.send, raid_embed, image)
                     
         except Exception as e:
             print(f"Error in stats command: {str(e)}")
@@ -178,17 +192,17 @@ class StatsCommands(commands.Cog):
                 print("Interaction deferred")
             
             server = ctx.guild.name
-            stats = storage.get_server_stats(server)
-            
-            if not stats:
-                embed = discord.Embed(title=f'{server}\'s Stats:')
-                embed.add_field(name="No stats were found.", value=None)
-            else:
-                embed = create_server_stats_embed(
-                    server,
-                    stats,
-                    str(ctx.guild.icon.url) if ctx.guild.icon else None
-                )
+            icon = str(ctx.guild.icon.url) if ctx.guild.icon else None
+
+            def build_server_stats() -> discord.Embed:
+                stats = storage.peek_server_stats(server)
+                if not stats:
+                    embed = discord.Embed(title=f'{server}\'s Stats:')
+                    embed.add_field(name="No stats were found.", value=None)
+                    return embed
+                return create_server_stats_embed(server, stats, icon)
+
+            embed = response_cache.get("server", (server, icon), storage.version("server_stats"), build_server_stats)
                 
             await ctx.send(embed=embed)
             
@@ -225,54 +239,53 @@ class StatsCommands(commands.Cog):
                     user = discord.utils.get(ctx.guild.members, nick=arg)
                     
                 if user:
-                    stats = storage.get_user_stats(arg)
+                    stats = storage.peek_user_stats(arg)
+
+                    def build_library() -> discord.Embed:
+                        if not stats or not stats.deck:
+                            return create_library_embed(arg)
+                        embed = discord.Embed(title=EMBED_LIBRARY.format(name=arg))
+                        embed.add_field(name='EX cards owned', value=len(stats.deck))
+                        return embed
+
+                    embed = response_cache.get("deck", arg, storage.version("user_stats"), build_library)
                     if not stats or not stats.deck:
-                        embed = create_library_embed(arg)
                         await ctx.send(embed=embed)
                         return
                         
                     # Create deck view
                     current_card = 0
-                    file = discord.File(
-                        Path(EX_DIR) / f"{stats.deck[0]}.gif",
-                        filename="image.gif"
-                    )
-                    
-                    embed = discord.Embed(title=EMBED_LIBRARY.format(name=arg))
-                    embed.set_image(url="attachment://image.gif")
-                    embed.add_field(name='EX cards owned', value=len(stats.deck))
                     
                     view = discord.ui.View()
                     
-                    # Add navigation buttons
-                    async def next_callback(interaction: discord.Interaction):
-                        nonlocal current_card
-                        current_card = (current_card + 1) % len(stats.deck)
-                        new_file = discord.File(
-                            Path(IMAGES_DIR) / "EX" / f"{stats.deck[current_card]}.gif",
-                            filename="nextcard.gif"
-                        )
+                    async def show_card(interaction: discord.Interaction):
+                        source = Path(EX_DIR) / f"{stats.deck[current_card]}.gif"
+                        path, digest = variants.resolve(source)
                         new_embed = discord.Embed(title=EMBED_LIBRARY.format(name=arg))
-                        new_embed.set_image(url="attachment://nextcard.gif")
+                        # Edits return no message to read a URL from, so only reuse known ones
+                        url = media.url_for(source)
+                        if url is None:
+                            new_embed.set_image(url=f"attachment://nextcard{path.suffix}")
+                            attachments = [image_bytes.file(path, f"nextcard{path.suffix}", digest)]
+                        else:
+                            new_embed.set_image(url=url)
+                            attachments = []
                         await interaction.response.edit_message(
                             embed=new_embed,
-                            attachments=[new_file]
+                            attachments=attachments
                         )
+                    
+                    # Add navigation buttons
+                    async def next_callback(interaction: discord.Interaction):
+                        nonlocal current_card
+                        current_card = (current_card + 1) % len(stats.deck)
+                        await show_card(interaction)
                         
                     async def prev_callback(interaction: discord.Interaction):
                         nonlocal current_card
                         if current_card > 0:
                             current_card -= 1
-                            new_file = discord.File(
-                                Path(IMAGES_DIR) / "EX" / f"{stats.deck[current_card]}.gif",
-                                filename="nextcard.gif"
-                            )
-                            new_embed = discord.Embed(title=EMBED_LIBRARY.format(name=arg))
-                            new_embed.set_image(url="attachment://nextcard.gif")
-                            await interaction.response.edit_message(
-                                embed=new_embed,
-                                attachments=[new_file]
-                            )
+                            await show_card(interaction)
                     
                     next_button = discord.ui.Button(label="View Next")
                     prev_button = discord.ui.Button(label="View Previous")
@@ -283,7 +296,13 @@ class StatsCommands(commands.Cog):
                     view.add_item(prev_button)
                     view.add_item(next_button)
                     
-                    await ctx.send(embed=embed, file=file, view=view)
+                    await media.send_embed(
+                        ctx.send,
+                        embed,
+                        Path(EX_DIR) / f"{stats.deck[0]}.gif",
+                        filename="image.gif",
+                        view=view
+                    )
                     
         except Exception as e:
             print(f"Error in deck command: {str(e)}")
@@ -302,8 +321,12 @@ class StatsCommands(commands.Cog):
                 await ctx.defer()
                 print("Interaction deferred")
 
-            top_ten = StatsManager.get_top_ten()
-            embed = create_top_ten_embed(top_ten)
+            embed = response_cache.get(
+                "standings",
+                (),
+                storage.version("character_stats"),
+                lambda: create_top_ten_embed(StatsManager.get_top_ten())
+            )
 
             await ctx.send(embed=embed)
 
@@ -313,5 +336,155 @@ class StatsCommands(commands.Cog):
             import traceback
             print(f"Traceback: {traceback.format_exc()}")
             await ctx.send(f"An error occured: {str(e)}", ephemeral=True)
+
+    @commands.hybrid_command(
+        name='leaderboard',
+        with_app_command=True,
+        help='Rank characters or users by any stat, optionally showing where one of them stands'
+    )
+    @app_commands.choices(metric=[app_commands.Choice(name=metric, value=metric) for metric in METRICS])
+    async def leaderboard(
+        self,
+        ctx: commands.Context,
+        metric: str,
+        *,
+        name: Optional[str] = None
+    ) -> None:
+        """Display one page of a leaderboard, with buttons for the rest."""
+        try:
+            if isinstance(ctx, discord.Interaction) or ctx.interaction:
+                await ctx.defer()
+                print("Interaction deferred")
+
+            if metric not in METRICS:
+                await ctx.send(ERR_UNKNOWN_METRIC.format(metric=metric, metrics=", ".join(METRICS)))
+                return
+
+            def page_count() -> int:
+                return max(1, -(-len(storage.leaderboards.index(metric)) // LEADERBOARD_PAGE_SIZE))
+
+            index = storage.leaderboards.index(metric)
+            current_page = 0
+
+            rank_line = None
+            if name is not None:
+                key = find_character(name) if METRICS[metric][0] == "character_stats" else name
+                rank = index.rank(key) if key is not None else None
+                if rank is None:
+                    rank_line = LEADERBOARD_UNRANKED.format(name=name)
+                else:
+                    rank_line = LEADERBOARD_RANK.format(name=key, rank=rank, total=len(index))
+                    current_page = (rank - 1) // LEADERBOARD_PAGE_SIZE
+
+            def page_embed() -> discord.Embed:
+                nonlocal current_page
+                # Fetched again for every page: a reload replaces the index
+                index = storage.leaderboards.index(metric)
+                pages = page_count()
+                current_page = min(current_page, pages - 1)
+                offset = current_page * LEADERBOARD_PAGE_SIZE
+                return response_cache.get(
+                    "leaderboard",
+                    (metric, current_page, pages, rank_line),
+                    storage.version(METRICS[metric][0]),
+                    lambda: create_leaderboard_embed(
+                        metric, index.top(LEADERBOARD_PAGE_SIZE, offset), offset, current_page + 1, pages, rank_line
+                    )
+                )
+
+            if page_count() == 1:
+                await ctx.send(embed=page_embed())
+                return
+
+            view = discord.ui.View()
+
+            async def next_callback(interaction: discord.Interaction):
+                nonlocal current_page
+                current_page = (current_page + 1) % page_count()
+                await interaction.response.edit_message(embed=page_embed())
+
+            async def prev_callback(interaction: discord.Interaction):
+                nonlocal current_page
+                current_page = (current_page - 1) % page_count()
+                await interaction.response.edit_message(embed=page_embed())
+
+            next_button = discord.ui.Button(label="Next Page")
+            prev_button = discord.ui.Button(label="Previous Page")
+
+            next_button.callback = next_callback
+            prev_button.callback = prev_callback
+
+            view.add_item(prev_button)
+            view.add_item(next_button)
+
+            await ctx.send(embed=page_embed(), view=view)
+
+        except Exception as e:
+            print(f"Error in leaderboard command: {str(e)}")
+            import traceback
+            print(f"Traceback: {traceback.format_exc()}")
+            await ctx.send(f"An error occurred: {str(e)}", ephemeral=True)
+
+    @commands.hybrid_command(
+        name='groups',
+        with_app_command=True,
+        help='List every character group with its members, rolls, raid wins and PvP wins'
+    )
+    @app_commands.choices(sort=[
+        app_commands.Choice(name=name, value=name)
+        for name in ("count", "members", "raids_won", "raids_completed", "pvp_wins")
+    ])
+    async def groups(self, ctx: commands.Context, sort: str = 'count') -> None:
+        """Display per-group totals, highest first."""
+        try:
+            if isinstance(ctx, discord.Interaction) or ctx.interaction:
+                await ctx.defer()
+                print("Interaction deferred")
+
+            def build_groups() -> discord.Embed:
+                totals = StatsManager.get_group_totals()
+                key = sort if sort in next(iter(totals.values()), {}) else 'count'
+                ordered = dict(sorted(totals.items(), key=lambda item: item[1][key], reverse=True))
+                return create_groups_embed(ordered)
+
+            embed = response_cache.get("groups", sort, storage.version("character_stats"), build_groups)
+            await ctx.send(embed=embed)
+
+        except Exception as e:
+            print(f"Error in groups command: {str(e)}")
+            import traceback
+            print(f"Traceback: {traceback.format_exc()}")
+            await ctx.send(f"An error occurred: {str(e)}", ephemeral=True)
+
+    @commands.hybrid_command(
+        name='trending',
+        with_app_command=True,
+        help='Show the characters rolled (or raided, or PvPed) most recently'
+    )
+    @app_commands.choices(
+        kind=[app_commands.Choice(name=kind, value=kind) for kind in ("rolls", "raids", "pvp")],
+        window=[app_commands.Choice(name=window, value=window) for window in TRENDING_WINDOWS]
+    )
+    async def trending(self, ctx: commands.Context, kind: str = 'rolls', window: str = 'day') -> None:
+        """Display the characters with the most activity in a recent window."""
+        try:
+            if kind not in ("rolls", "raids", "pvp") or window not in TRENDING_WINDOWS:
+                await ctx.send(f"Choose rolls, raids or pvp over {', '.join(TRENDING_WINDOWS)}.", ephemeral=True)
+                return
+
+            # Not response-cached: the window moves with the clock, not with the stores
+            footer = None
+            if ctx.guild:
+                count = StatsManager.get_recent_activity("server", ctx.guild.name, kind, window)
+                footer = TRENDING_SERVER.format(server=ctx.guild.name, count=count, kind=kind, window=window)
+            embed = create_trending_embed(kind, window, StatsManager.get_trending(kind, window), footer)
+            await ctx.send(embed=embed)
+
+        except Exception as e:
+            print(f"Error in trending command: {str(e)}")
+            import traceback
+            print(f"Traceback: {traceback.format_exc()}")
+            await ctx.send(f"An error occurred: {str(e)}", ephemeral=True)
+
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(StatsCommands(bot)) 
\ No newline at end of file
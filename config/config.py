@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import Final
+from typing import Dict, Final, Tuple
 
 # Directory paths
 ROOT_DIR: Final[Path] = Path(__file__).parent.parent
@@ -8,7 +8,7 @@ ASSETS_DIR: Final[Path] = ROOT_DIR / "assets/utility"
 IMAGES_DIR: Final[Path] = ROOT_DIR / "assets/characters"
 TOOLS_DIR: Final[Path] = ROOT_DIR / "assets/items"
 BOSSES_DIR: Final[Path] = ROOT_DIR / "assets/bosses"
-EX_DIR: Final[Path] = ROOT_DIR / "assets/ex"
+EX_DIR: Final[Path] = ROOT_DIR / "assets/EX"
 EVOLUTIONS_DIR: Final[Path] = ROOT_DIR / "assets/evolutions"
 
 # File paths
@@ -17,6 +17,39 @@ BOSS_STATS_FILE: Final[Path] = ROOT_DIR / "data/boss_stats.json"
 TOOL_STATS_FILE: Final[Path] = ROOT_DIR / "data/tool_stats.json"
 USER_STATS_FILE: Final[Path] = ROOT_DIR / "data/user_stats.json"
 SERVER_STATS_FILE: Final[Path] = ROOT_DIR / "data/server_stats.json"
+SQLITE_DB_FILE: Final[Path] = ROOT_DIR / "data/alexbot.db"
+JOURNAL_DIR: Final[Path] = ROOT_DIR / "data/journal"
+BOOT_SNAPSHOT_FILE: Final[Path] = ROOT_DIR / "data/stats_snapshot.bin"
+ACTIVITY_FILE: Final[Path] = ROOT_DIR / "data/activity.log"
+
+# Persistence settings
+STORAGE_BACKEND: Final[str] = os.getenv('STORAGE_BACKEND', 'json')  # "json", "sqlite" or "journal"
+SAVE_INTERVAL: Final[float] = 10.0  # seconds between write-behind flushes
+SAVE_MUTATION_THRESHOLD: Final[int] = 50  # flush early after this many mutations
+JOURNAL_SEGMENT_BYTES: Final[int] = 1_000_000  # start a new journal segment past this size
+JOURNAL_COMPACT_SEGMENTS: Final[int] = 4  # fold closed segments into a snapshot at this count
+
+# Index settings
+DAMAGE_TABLE: Final[bool] = True  # precompute character x tool damage (needs numpy)
+NEGATIVE_LOOKUP_CACHE_SIZE: Final[int] = 256  # remembered /stats queries that matched no character
+ASSET_RESCAN_INTERVAL: Final[float] = 30.0  # seconds between asset folder mtime checks
+LEADERBOARD_PAGE_SIZE: Final[int] = 10  # entries per /leaderboard page
+RESPONSE_CACHE_SIZE: Final[int] = 512  # stats command responses kept until their stores change
+
+# Media settings
+MEDIA_URL_TTL: Final[float] = 86400.0  # seconds to trust a CDN URL that has no ex= expiry
+MEDIA_URL_REFRESH_MARGIN: Final[float] = 600.0  # re-upload this long before a CDN URL expires
+IMAGE_CACHE_BYTES: Final[int] = 64 * 1024 * 1024  # memory for cached image file contents
+IMAGE_CACHE_WARMUP: Final[bool] = True  # preload the top ten characters' images at startup
+VARIANTS_DIR: Final[Path] = ROOT_DIR / "data/variants"  # resized copies of the assets (needs Pillow)
+THUMBNAIL_SIZE: Final[int] = 256  # longest side of embed thumbnails, in pixels
+FULL_IMAGE_SIZE: Final[int] = 1024  # longest side of full-size images, in pixels
+JPEG_QUALITY: Final[int] = 85
+HANDS_DIR: Final[Path] = ROOT_DIR / "data/variants/hands"  # rendered raid hands (needs Pillow)
+HAND_CARD_HEIGHT: Final[int] = 384  # height of each card in a rendered hand, in pixels
+HAND_COLUMNS: Final[int] = 4  # cards per row in a rendered hand
+HAND_RENDER_WORKERS: Final[int] = 2  # threads drawing hands
+HAND_CACHE_ENTRIES: Final[int] = 256  # rendered hands kept (in memory and on disk), least recently used dropped first
 
 # Bot settings
 DISCORD_TOKEN: Final[str] = os.getenv('DISCORD_TOKEN')
@@ -34,6 +67,37 @@ HARDMODE_HEALTH_MULTIPLIER: Final[float] = 1.15
 NIGHTMARE_HEALTH_MULTIPLIER: Final[float] = 1.3
 CAMPAIGN_HEALTH_SCALING: Final[float] = 0.15
 
+# Roll odds (relative weights, drawn through alias tables)
+RARITY_WEIGHTS: Final[Dict[str, float]] = {"EX": 1.0, "standard": 776.0}  # 1 in 777 rolls is an EX card
+CHARACTER_WEIGHTS: Final[Dict[str, float]] = {}  # per-character weight overrides, by lowercase name (default 1.0)
+TOOL_WEIGHTS: Final[Dict[str, float]] = {}  # per-tool weight overrides (default 1.0)
+BOSS_WEIGHTS: Final[Dict[str, float]] = {}  # per-boss weight overrides for classic raids (default 1.0)
+
+# Activity counters
+ACTIVITY_RESOLUTIONS: Final[Dict[str, Tuple[int, int]]] = {  # name -> (seconds per bucket, buckets kept)
+    "minute": (60, 60),
+    "hour": (3600, 48),
+    "day": (86400, 30)
+}
+TRENDING_WINDOWS: Final[Dict[str, Tuple[str, int]]] = {  # /trending window -> (resolution, buckets)
+    "hour": ("minute", 60),
+    "day": ("hour", 24),
+    "week": ("day", 7),
+    "month": ("day", 30)
+}
+ACTIVITY_COMPACT_BYTES: Final[int] = 4 * 1024 * 1024  # fold the activity log once it passes this (and twice its last compacted size)
+# (entity, field) increments that count as an activity event of a kind
+ACTIVITY_EVENTS: Final[Dict[Tuple[str, str], str]] = {
+    ("user", "total_rolls"): "rolls",
+    ("server", "total_rolls"): "rolls",
+    ("character", "count"): "rolls",
+    ("user", "total_raids"): "raids",
+    ("server", "total_raids"): "raids",
+    ("character", "raids_completed"): "raids",
+    ("user", "total_pvp"): "pvp",
+    ("character", "total_pvp"): "pvp"
+}
+
 # Image settings
 ALLOWED_IMAGE_EXTENSIONS: Final[tuple] = (".png", ".jpg", ".jpeg", ".gif")
 
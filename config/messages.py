@@ -12,6 +12,7 @@ ERR_INVALID_PATH: Final[str] = "Invalid file path detected"
 ERR_CHARACTER_NOT_FOUND: Final[str] = "Unable to find character {name}. Check your spelling and try again."
 ERR_CHARACTER_NOT_REVEALED: Final[str] = "This character has not been revealed! Try using !roll to unlock the ability to view them here."
 ERR_NO_STATS: Final[str] = "No stats were found. Try !roll or /raid to start."
+ERR_UNKNOWN_METRIC: Final[str] = "There is no {metric} leaderboard. Try one of: {metrics}"
 
 # Success messages
 SUCCESS_SYNC: Final[str] = "Command tree synced."
@@ -60,4 +61,14 @@ EMBED_CHARACTER_STATS: Final[str] = "{name} Stats:"
 EMBED_HIGHEST_ROLL: Final[str] = "Highest Roll:"
 EMBED_HIGHEST_ROLL_TIE: Final[str] = "Highest Roll - Tie:"
 EMBED_RAID_MASTER: Final[str] = "The Raid Master:" 
-EMBED_TOP_TEN: Final[str] = "Top Ten Characters by Roll:"
\ No newline at end of file
+EMBED_TOP_TEN: Final[str] = "Top Ten Characters by Roll:"
+EMBED_LEADERBOARD: Final[str] = "Leaderboard - {metric}:"
+LEADERBOARD_PAGE: Final[str] = "Page {page}/{pages}"
+LEADERBOARD_RANK: Final[str] = "{name} is ranked #{rank} of {total}"
+LEADERBOARD_UNRANKED: Final[str] = "{name} is not on this leaderboard"
+EMBED_GROUPS: Final[str] = "Character Groups:"
+EMBED_TRENDING: Final[str] = "Trending {kind} - last {window}:"
+TRENDING_ENTRY: Final[str] = "**{name}** - {count}"
+TRENDING_SERVER: Final[str] = "{server}: {count} {kind} this {window}"
+TRENDING_EMPTY: Final[str] = "Nothing yet."
+GROUP_TOTALS: Final[str] = "**{group}** - {members} members, {count} rolls, {raids_won}/{raids_completed} raids won, {pvp_wins} PvP wins"
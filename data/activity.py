@@ -0,0 +1,251 @@
+import heapq
+import marshal
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config.config import ACTIVITY_FILE, ACTIVITY_RESOLUTIONS, ACTIVITY_EVENTS, ACTIVITY_COMPACT_BYTES
+from .backends import atomic_write
+
+FORMAT_VERSION = 2
+
+# One ring per resolution, each a flat [bucket, count, bucket, count, ...]
+# list of the non-empty buckets still in the window, oldest first
+Rings = List[List[int]]
+
+# (entity, kind) -> key -> rings
+RingIndex = Dict[Tuple[str, str], Dict[str, Rings]]
+
+class ActivityCounters:
+    """
+    Per-minute, per-hour and per-day event counts for users, servers and characters.
+
+    Rings are sparse: they exist only for the (entity, key, kind) triples
+    that had events, and hold only non-empty buckets. Recording an event
+    touches the newest bucket of each resolution and drops buckets that
+    fell out of the window; a count sums at most one window. Neither
+    depends on how much history there is.
+
+    Changed rings are appended to ACTIVITY_FILE (a log of marshalled
+    records) by a background thread, which folds the log down to the
+    latest ring per key, minus expired ones, once it outgrows
+    ACTIVITY_COMPACT_BYTES.
+    """
+
+    def __init__(self, path: Path = ACTIVITY_FILE, clock: Callable[[], float] = time.time):
+        self.path = Path(path)
+        self.clock = clock
+        self.resolutions = list(ACTIVITY_RESOLUTIONS.items())
+        self._resolution_index = {name: r for r, (name, _) in enumerate(self.resolutions)}
+        self.rings: RingIndex = {}
+        self._dirty: Dict[Tuple[str, str, str], None] = {}
+
+        # Background writer state
+        self._pending: Dict[Tuple[str, str, str], Rings] = {}
+        # Rings whose write failed and that have nothing newer pending, retried on the next save
+        self._failed: Dict[Tuple[str, str, str], Rings] = {}
+        self._busy = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._compacted_size = 0
+
+    def _header(self) -> tuple:
+        return ("activity", FORMAT_VERSION, tuple(self.resolutions))
+
+    def _trim(self, rings: Rings, now: float) -> bool:
+        """Drop buckets that fell out of every window. Returns True if nothing is left."""
+        empty = True
+        for ring, (_, (width, buckets)) in zip(rings, self.resolutions):
+            oldest = int(now // width) - buckets
+            while ring and ring[0] <= oldest:
+                del ring[:2]
+            empty = empty and not ring
+        return empty
+
+    def record(self, entity: str, key: str, kind: str, amount: int = 1) -> None:
+        """Count amount events of a kind (e.g. "rolls") for an entity, now."""
+        now = self.clock()
+        keys = self.rings.setdefault((entity, kind), {})
+        rings = keys.get(key)
+        if rings is None:
+            rings = keys[key] = [[] for _ in self.resolutions]
+        for ring, (_, (width, _)) in zip(rings, self.resolutions):
+            bucket = int(now // width)
+            if ring and ring[-2] == bucket:
+                ring[-1] += amount
+            else:
+                ring += (bucket, amount)
+        self._trim(rings, now)
+        self._dirty[(entity, kind, key)] = None
+
+    def on_increment(self, entity: str, key: str, field_name: str, delta: int) -> None:
+        """Record the event a stats increment stands for, if any (see ACTIVITY_EVENTS)."""
+        kind = ACTIVITY_EVENTS.get((entity, field_name))
+        if kind is not None and delta > 0:
+            self.record(entity, key, kind, int(delta))
+
+    def _window_count(self, rings: Rings, resolution: str, buckets: int, now: float) -> int:
+        r = self._resolution_index[resolution]
+        width, size = self.resolutions[r][1]
+        oldest = int(now // width) - min(buckets, size)
+        ring = rings[r]
+        total = 0
+        # Newest first, stopping at the first bucket outside the window
+        for i in range(len(ring) - 2, -1, -2):
+            if ring[i] <= oldest:
+                break
+            total += ring[i + 1]
+        return total
+
+    def count(self, entity: str, key: str, kind: str, resolution: str = "hour", buckets: int = 1) -> int:
+        """
+        Events of a kind in the last `buckets` buckets of a resolution,
+        counting the current, partly elapsed one. count(..., "day", 1) is
+        "today" (UTC); count(..., "day", 7) is the last seven days.
+        """
+        rings = self.rings.get((entity, kind), {}).get(key)
+        if rings is None:
+            return 0
+        return self._window_count(rings, resolution, buckets, self.clock())
+
+    def rate(self, entity: str, key: str, kind: str, resolution: str = "hour", buckets: int = 1) -> float:
+        """Average events per bucket over the last `buckets` buckets."""
+        buckets = min(buckets, self.resolutions[self._resolution_index[resolution]][1][1])
+        return self.count(entity, key, kind, resolution, buckets) / buckets
+
+    def trending(self, entity: str, kind: str, resolution: str = "hour", buckets: int = 1, k: int = 10) -> List[Tuple[str, int]]:
+        """The k keys of an entity with the most events of a kind in the window, most first."""
+        now = self.clock()
+        counts = (
+            (key, self._window_count(rings, resolution, buckets, now))
+            for key, rings in self.rings.get((entity, kind), {}).items()
+        )
+        return [(key, n) for key, n in heapq.nlargest(k, counts, key=lambda item: item[1]) if n > 0]
+
+    def load(self) -> None:
+        """Load saved counters, starting empty if the log is missing or has a different layout."""
+        self.drain()
+        self.rings = {}
+        self._dirty = {}
+        try:
+            with open(self.path, 'rb') as f:
+                records = self._read_log(f)
+            self._compacted_size = self.path.stat().st_size
+        except FileNotFoundError:
+            records = {}
+        if records is None:
+            print("Activity counters were saved with a different layout; starting fresh")
+            records = {}
+        # Rings that failed to save are newer than the log; keep them (still queued for retry)
+        with self._cond:
+            records.update((ident, [list(ring) for ring in rings]) for ident, rings in self._failed.items())
+        now = self.clock()
+        for (entity, kind, key), rings in records.items():
+            if not self._trim(rings, now):
+                self.rings.setdefault((entity, kind), {})[key] = rings
+
+    def _read_log(self, f) -> Optional[Dict[Tuple[str, str, str], Rings]]:
+        """Replay the log into the latest rings per key; None if its header doesn't match."""
+        try:
+            if marshal.load(f) != self._header():
+                return None
+        except (EOFError, ValueError, TypeError):
+            return {}
+        records = {}
+        while True:
+            try:
+                ident, rings = marshal.load(f)
+            except EOFError:
+                break
+            except (ValueError, TypeError):
+                # Torn write from a crash; nothing after it was acknowledged
+                break
+            records[ident] = rings
+        return records
+
+    def save(self, background: bool = False) -> None:
+        """
+        Queue the rings changed since the last save to be appended to the
+        log. Only the changed rings are copied on the calling thread;
+        encoding and writing happen on the writer thread. Without
+        background, wait until they have been written (or failed to be).
+        """
+        changed = {}
+        for entity, kind, key in self._dirty:
+            rings = self.rings.get((entity, kind), {}).get(key)
+            if rings is not None:
+                changed[(entity, kind, key)] = [list(ring) for ring in rings]
+        self._dirty = {}
+        with self._cond:
+            # Failed rings are older than anything queued since
+            for ident, rings in self._failed.items():
+                self._pending.setdefault(ident, rings)
+            self._failed = {}
+            self._pending.update(changed)
+            if self._pending:
+                self._cond.notify_all()
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="activity-writer", daemon=True)
+                    self._thread.start()
+        if not background:
+            self.drain()
+
+    def drain(self) -> None:
+        """Block until every queued ring has been written or has failed."""
+        with self._cond:
+            while self._pending or self._busy:
+                self._cond.wait()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                batch, self._pending = self._pending, {}
+                self._busy = True
+            try:
+                self._append(batch)
+            except (OSError, ValueError) as e:
+                print(f"Error writing activity counters, will retry: {e}")
+                with self._cond:
+                    # Wait for the next save rather than retrying in a loop
+                    for ident, rings in batch.items():
+                        if ident not in self._pending:
+                            self._failed[ident] = rings
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def _append(self, batch: Dict[Tuple[str, str, str], Rings]) -> None:
+        """Append records to the log (starting a new one if needed) and compact it when it has grown."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'ab') as f:
+            start = f.tell()
+            try:
+                if start == 0:
+                    marshal.dump(self._header(), f)
+                for ident, rings in batch.items():
+                    marshal.dump((ident, rings), f)
+                f.flush()
+                os.fsync(f.fileno())
+            except OSError:
+                # Cut off the partial records, or loading would stop at them
+                f.truncate(start)
+                raise
+            size = f.tell()
+        if size > max(ACTIVITY_COMPACT_BYTES, 2 * self._compacted_size):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the log as one record per live ring."""
+        with open(self.path, 'rb') as f:
+            records = self._read_log(f) or {}
+        now = self.clock()
+        data = [marshal.dumps(self._header())]
+        for ident, rings in records.items():
+            if not self._trim(rings, now):
+                data.append(marshal.dumps((ident, rings)))
+        atomic_write(self.path, b"".join(data))
+        self._compacted_size = self.path.stat().st_size
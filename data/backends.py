@@ -0,0 +1,422 @@
+import os
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+from dataclasses import asdict, fields
+
+from config.config import (
+    CHARACTER_STATS_FILE,
+    BOSS_STATS_FILE,
+    TOOL_STATS_FILE,
+    USER_STATS_FILE,
+    SERVER_STATS_FILE,
+    SQLITE_DB_FILE,
+    JOURNAL_DIR,
+    JOURNAL_SEGMENT_BYTES,
+    JOURNAL_COMPACT_SEGMENTS
+)
+from .models import CharacterStats, BossStats, ToolStats, UserStats, ServerStats
+from .encoder import stitch
+
+# Store attribute name -> model persisted in it
+STORE_MODELS: Dict[str, type] = {
+    "character_stats": CharacterStats,
+    "boss_stats": BossStats,
+    "tool_stats": ToolStats,
+    "user_stats": UserStats,
+    "server_stats": ServerStats
+}
+
+def atomic_write(file_path: Path, data: Union[str, bytes]) -> None:
+    """Write a file via a temp file, fsync and rename so readers never see a partial write."""
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    if isinstance(data, str):
+        data = data.encode('utf8')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+
+def _newest_mtime(paths, require_all: bool = False) -> Optional[int]:
+    """
+    Newest modification time (ns) of the files that exist. None if none
+    exist, or if require_all and any is missing.
+    """
+    newest = None
+    for path in paths:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            if require_all:
+                return None
+            continue
+        newest = mtime if newest is None else max(newest, mtime)
+    return newest
+
+class JsonBackend:
+    """Persists each store as a pretty-printed JSON file."""
+
+    # Every save rewrites the whole store, so it is given pre-encoded
+    # fragments for every record (see data.encoder)
+    full_rewrite = True
+
+    # Store attribute name -> JSON file it is persisted to
+    STORE_FILES: Dict[str, Path] = {
+        "character_stats": CHARACTER_STATS_FILE,
+        "boss_stats": BOSS_STATS_FILE,
+        "tool_stats": TOOL_STATS_FILE,
+        "user_stats": USER_STATS_FILE,
+        "server_stats": SERVER_STATS_FILE
+    }
+
+    def _load_json_file(self, file_path: Path) -> dict:
+        """Load a JSON file, creating an empty one if it doesn't exist."""
+        try:
+            with open(file_path, 'r', encoding='utf8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(file_path, 'w', encoding='utf8') as f:
+                json.dump({}, f)
+            return {}
+
+    def load(self, store: str) -> Dict[str, dict]:
+        """Load the raw records of a store."""
+        return self._load_json_file(self.STORE_FILES[store])
+
+    def last_modified(self) -> Optional[int]:
+        """
+        Newest modification time (ns) of the store files, or None if any is
+        missing (e.g. deleted to reset stats), so a boot snapshot is never
+        trusted over a missing file.
+        """
+        return _newest_mtime(self.STORE_FILES.values(), require_all=True)
+
+    def load_all(self) -> Dict[str, Dict[str, dict]]:
+        """Load the raw records of every store."""
+        return {store: self.load(store) for store in STORE_MODELS}
+
+    def save(self, store: str, records: Dict[str, str], keys: Optional[Set[str]] = None) -> None:
+        """Rewrite a store's file from encoded fragments, regardless of keys."""
+        atomic_write(self.STORE_FILES[store], stitch(records))
+
+    def close(self) -> None:
+        pass
+
+class SqliteBackend:
+    """
+    Persists each store as a table in a local SQLite database.
+
+    Every model field gets its own column; lists and dicts are stored as JSON
+    text. Saves only upsert (or delete) the keys that changed.
+    """
+
+    # Columns indexed for leaderboard-style queries
+    INDEXED_COLUMNS: Dict[str, Tuple[str, ...]] = {
+        "character_stats": ("count", "raids_won", "pvp_wins"),
+        "user_stats": ("total_rolls", "raid_wins", "pvp_wins", "highest_damage", "total_damage"),
+        "server_stats": ("total_rolls", "raid_wins")
+    }
+
+    _COLUMN_TYPES: Dict[type, str] = {int: "INTEGER", float: "REAL", bool: "INTEGER", str: "TEXT"}
+
+    full_rewrite = False
+
+    def __init__(self, db_file: Path = SQLITE_DB_FILE):
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+        # Loads run on the event loop thread, saves on the storage writer thread
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._upsert_sql: Dict[str, str] = {}
+        self._delete_sql: Dict[str, str] = {}
+        self._columns: Dict[str, List[Tuple[str, str]]] = {}
+        for store, cls in STORE_MODELS.items():
+            self._create_table(store, cls)
+
+    def _create_table(self, store: str, cls: type) -> None:
+        """Create a store's table and indexes, adding columns for new model fields."""
+        columns = []
+        for f in fields(cls):
+            sql_type = self._COLUMN_TYPES.get(f.type)
+            # Lists, dicts and optionals are kept as JSON text
+            kind = "json" if sql_type is None else "bool" if f.type is bool else "plain"
+            columns.append((f.name, kind, sql_type or "TEXT"))
+        self._columns[store] = [(name, kind) for name, kind, _ in columns]
+
+        column_defs = ", ".join(f'"{name}" {sql_type}' for name, _, sql_type in columns)
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS {store} (name TEXT PRIMARY KEY, {column_defs})')
+        existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({store})")}
+        for name, _, sql_type in columns:
+            if name not in existing:
+                self.conn.execute(f'ALTER TABLE {store} ADD COLUMN "{name}" {sql_type}')
+        for column in self.INDEXED_COLUMNS.get(store, ()):
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{store}_{column} ON {store} ("{column}")')
+        self.conn.commit()
+
+        names = [name for name, _, _ in columns]
+        quoted = ", ".join(f'"{name}"' for name in names)
+        placeholders = ", ".join("?" for _ in range(len(names) + 1))
+        updates = ", ".join(f'"{name}" = excluded."{name}"' for name in names)
+        self._upsert_sql[store] = (
+            f"INSERT INTO {store} (name, {quoted}) VALUES ({placeholders}) "
+            f"ON CONFLICT(name) DO UPDATE SET {updates}"
+        )
+        self._delete_sql[store] = f"DELETE FROM {store} WHERE name = ?"
+
+    def last_modified(self) -> Optional[int]:
+        """
+        SQLite touches its WAL file just by opening the database, so file times
+        can't tell whether a boot snapshot is current. Always load from the database.
+        """
+        return None
+
+    def _to_row(self, store: str, key: str, record: dict) -> tuple:
+        row = [key]
+        for name, kind in self._columns[store]:
+            value = record[name]
+            row.append(json.dumps(value) if kind == "json" else value)
+        return tuple(row)
+
+    def load(self, store: str) -> Dict[str, dict]:
+        """Load the raw records of a store."""
+        columns = self._columns[store]
+        quoted = ", ".join(f'"{name}"' for name, _ in columns)
+        data = {}
+        with self._lock:
+            rows = self.conn.execute(f"SELECT name, {quoted} FROM {store}").fetchall()
+        for row in rows:
+            record = {}
+            for (name, kind), value in zip(columns, row[1:]):
+                if value is None:
+                    continue
+                if kind == "json":
+                    value = json.loads(value)
+                elif kind == "bool":
+                    value = bool(value)
+                record[name] = value
+            data[row[0]] = record
+        return data
+
+    def load_all(self) -> Dict[str, Dict[str, dict]]:
+        """Load the raw records of every store."""
+        return {store: self.load(store) for store in STORE_MODELS}
+
+    def save(self, store: str, records: Dict[str, dict], keys: Optional[Set[str]] = None) -> None:
+        """Upsert the given keys (all keys if None); keys no longer in records are deleted."""
+        if keys is None:
+            keys = set(records)
+        upserts = [self._to_row(store, k, records[k]) for k in keys if k in records]
+        deletes = [(k,) for k in keys if k not in records]
+        with self._lock, self.conn:
+            if upserts:
+                self.conn.executemany(self._upsert_sql[store], upserts)
+            if deletes:
+                self.conn.executemany(self._delete_sql[store], deletes)
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+class JournalBackend:
+    """
+    Appends every saved record to a segmented on-disk journal.
+
+    Each line is a compact JSON record ``[store, key, fields]`` (fields is
+    null for a deleted key). Once enough segments have filled up, a
+    background thread folds them into ``snapshot.json`` and deletes them.
+    Loading reads the snapshot and replays the remaining segments; a torn
+    last line from a crash is skipped. An empty journal is first seeded
+    from the JSON stat files, so switching backends keeps existing stats.
+    """
+
+    full_rewrite = False
+
+    SNAPSHOT_NAME = "snapshot.json"
+    SEGMENT_PATTERN = "journal-*.log"
+
+    def __init__(
+        self,
+        journal_dir: Path = JOURNAL_DIR,
+        segment_bytes: int = JOURNAL_SEGMENT_BYTES,
+        compact_segments: int = JOURNAL_COMPACT_SEGMENTS
+    ):
+        self.journal_dir = journal_dir
+        self.segment_bytes = segment_bytes
+        self.compact_segments = compact_segments
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self._compactor: Optional[threading.Thread] = None
+        self._compact_lock = threading.Lock()
+        existing = self._segments()
+        self._segment_index = existing[-1] + 1 if existing else 1
+        self._segment = None
+        self._segment_size = 0
+
+    def _segment_path(self, index: int) -> Path:
+        return self.journal_dir / f"journal-{index:06d}.log"
+
+    def _segments(self) -> List[int]:
+        """Indexes of the segment files on disk, oldest first."""
+        return sorted(int(p.stem.split("-")[1]) for p in self.journal_dir.glob(self.SEGMENT_PATTERN))
+
+    def _read_snapshot(self) -> Tuple[int, Dict[str, Dict[str, dict]]]:
+        """Return (first segment not folded in, store data) from the snapshot."""
+        try:
+            with open(self.journal_dir / self.SNAPSHOT_NAME, 'r', encoding='utf8') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return 1, {store: {} for store in STORE_MODELS}
+        stores = snapshot["stores"]
+        for store in STORE_MODELS:
+            stores.setdefault(store, {})
+        return snapshot["next_segment"], stores
+
+    def _replay(self, stores: Dict[str, Dict[str, dict]], index: int) -> None:
+        """Apply one segment's records to store data."""
+        with open(self._segment_path(index), 'r', encoding='utf8') as f:
+            for line in f:
+                try:
+                    store, key, record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn write from a crash; later records were never acknowledged
+                    break
+                if record is None:
+                    stores[store].pop(key, None)
+                else:
+                    stores[store][key] = record
+
+    def _seed_from_json(self) -> None:
+        """Write the JSON stat files, if there are any, as the journal's first snapshot."""
+        stores = {}
+        for store, file_path in JsonBackend.STORE_FILES.items():
+            try:
+                with open(file_path, 'r', encoding='utf8') as f:
+                    stores[store] = json.load(f)
+            except FileNotFoundError:
+                stores[store] = {}
+        if not any(stores.values()):
+            return
+        snapshot = {"next_segment": self._segment_index, "stores": stores}
+        atomic_write(self.journal_dir / self.SNAPSHOT_NAME, json.dumps(snapshot, separators=(",", ":")))
+        print(f"Seeded the journal from the JSON stat files ({sum(map(len, stores.values()))} records)")
+
+    def load_all(self) -> Dict[str, Dict[str, dict]]:
+        """Load the latest snapshot and replay the journal tail."""
+        self._wait_for_compactor()
+        if not (self.journal_dir / self.SNAPSHOT_NAME).exists() and not self._segments():
+            self._seed_from_json()
+        next_segment, stores = self._read_snapshot()
+        for index in self._segments():
+            if index >= next_segment:
+                self._replay(stores, index)
+        return stores
+
+    def load(self, store: str) -> Dict[str, dict]:
+        """Load the raw records of a store."""
+        return self.load_all()[store]
+
+    def last_modified(self) -> Optional[int]:
+        """Newest modification time (ns) of the snapshot and segments, None if none exist."""
+        paths = [self.journal_dir / self.SNAPSHOT_NAME]
+        paths.extend(self.journal_dir.glob(self.SEGMENT_PATTERN))
+        return _newest_mtime(paths)
+
+    def _open_segment(self) -> None:
+        self._segment = open(self._segment_path(self._segment_index), 'a', encoding='utf8')
+        self._segment_size = self._segment.tell()
+
+    def _roll_segment(self) -> None:
+        """Close the active segment so the next append starts a new one."""
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+            self._segment_index += 1
+
+    def save(self, store: str, records: Dict[str, dict], keys: Optional[Set[str]] = None) -> None:
+        """Append the given keys (all keys if None) to the journal."""
+        if keys is None:
+            keys = set(records)
+        if self._segment is None:
+            self._open_segment()
+        lines = []
+        for key in keys:
+            record = records.get(key)
+            lines.append(json.dumps([store, key, record], separators=(",", ":")) + "\n")
+        text = "".join(lines)
+        self._segment.write(text)
+        self._segment.flush()
+        os.fsync(self._segment.fileno())
+        self._segment_size += len(text)
+
+        if self._segment_size >= self.segment_bytes:
+            self._roll_segment()
+            if len(self._segments()) >= self.compact_segments:
+                self.compact(background=True)
+
+    def _fold(self, up_to: int) -> None:
+        """Fold every segment before up_to into the snapshot and delete them."""
+        next_segment, stores = self._read_snapshot()
+        folded = [index for index in self._segments() if index < up_to]
+        for index in folded:
+            if index >= next_segment:
+                self._replay(stores, index)
+        snapshot = {"next_segment": up_to, "stores": stores}
+        atomic_write(self.journal_dir / self.SNAPSHOT_NAME, json.dumps(snapshot, separators=(",", ":")))
+        for index in folded:
+            self._segment_path(index).unlink(missing_ok=True)
+
+    def compact(self, background: bool = False) -> None:
+        """Fold all closed segments into a new snapshot."""
+        # Everything before the active (or next) segment is closed
+        up_to = self._segment_index
+        with self._compact_lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            if not background:
+                self._fold(up_to)
+                return
+            self._compactor = threading.Thread(target=self._fold, args=(up_to,), daemon=True)
+            self._compactor.start()
+
+    def _wait_for_compactor(self) -> None:
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def close(self) -> None:
+        """Close the active segment and fold everything into the snapshot."""
+        self._roll_segment()
+        self._wait_for_compactor()
+        self.compact()
+
+def create_backend(name: str):
+    """Create the storage backend named in config."""
+    if name == "sqlite":
+        return SqliteBackend()
+    if name == "journal":
+        return JournalBackend()
+    if name == "json":
+        return JsonBackend()
+    raise ValueError(f"Unknown storage backend: {name}")
+
+def migrate_json_to_sqlite(db_file: Path = SQLITE_DB_FILE) -> Dict[str, int]:
+    """Copy every record from the JSON files into the SQLite database."""
+    # Imported here to avoid a circular import with data.storage
+    from .storage import DataStorage
+
+    source = DataStorage(backend=JsonBackend())
+    source.load_all()
+    target = SqliteBackend(db_file)
+    counts = {}
+    try:
+        for store in STORE_MODELS:
+            records = {k: asdict(v) for k, v in getattr(source, store).items()}
+            target.save(store, records)
+            counts[store] = len(records)
+    finally:
+        target.close()
+    return counts
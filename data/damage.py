@@ -0,0 +1,133 @@
+from typing import Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; without it damage is computed per lookup
+    np = None
+
+from .models import CharacterStats, ToolStats
+
+DEFAULT_TOOL = ToolStats()
+
+def damage_multiplier(character: str, char_stats: CharacterStats, tool_stats: ToolStats) -> float:
+    """Damage of a character holding a tool: count x 10, times the tool's multiplier, doubled on a group match."""
+    base_multiplier = char_stats.count * 10
+    if character in tool_stats.character_multipliers:
+        base_multiplier *= tool_stats.character_multipliers[character]
+    else:
+        base_multiplier *= tool_stats.default_multiplier
+    if tool_stats.group == char_stats.group:
+        base_multiplier *= 2
+    return base_multiplier
+
+class DamageTable:
+    """
+    damage_multiplier for every character x tool pair, as a NumPy matrix.
+
+    Registered as a DataStorage listener: a character's row is marked
+    stale when its stats change and a tool's column when the tool's do,
+    and stale cells are recomputed on the next lookup. Column 0 is the
+    "no tool" column (convoy extras, tools without stats). Values are
+    float64 so lookups equal the scalar computation exactly.
+    """
+
+    _INITIAL_CAPACITY = 64
+
+    def __init__(self):
+        self._storage = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.rows: Dict[Hashable, int] = {}
+        self.cols: Dict[Hashable, int] = {None: 0}
+        self.table = np.zeros((self._INITIAL_CAPACITY, self._INITIAL_CAPACITY), dtype=np.float64)
+        self._stale_rows: Set[int] = set()
+        self._stale_cols: Set[int] = set()
+        self._characters: List[Hashable] = []
+        self._tools: List[Hashable] = [None]
+
+    def _grow(self, rows: int, cols: int) -> None:
+        height, width = self.table.shape
+        if rows <= height and cols <= width:
+            return
+        table = np.zeros((max(height, rows * 2), max(width, cols * 2)), dtype=np.float64)
+        table[:height, :width] = self.table
+        self.table = table
+
+    def _add_row(self, key: Hashable) -> int:
+        row = self.rows[key] = len(self._characters)
+        self._characters.append(key)
+        self._grow(len(self._characters), len(self._tools))
+        self._stale_rows.add(row)
+        return row
+
+    def _add_col(self, key: Hashable) -> int:
+        col = self.cols[key] = len(self._tools)
+        self._tools.append(key)
+        self._grow(len(self._characters), len(self._tools))
+        self._stale_cols.add(col)
+        return col
+
+    def _tool(self, key: Hashable) -> ToolStats:
+        stats = self._storage.tool_stats.get(key) if key is not None else None
+        return stats if stats is not None else DEFAULT_TOOL
+
+    def _refresh(self) -> None:
+        """Recompute stale rows and columns."""
+        if self._stale_rows:
+            tools = [self._tool(key) for key in self._tools]
+            for row in self._stale_rows:
+                key = self._characters[row]
+                char_stats = self._storage.get_character_stats(key)
+                self.table[row, :len(tools)] = [damage_multiplier(key, char_stats, t) for t in tools]
+            self._stale_rows.clear()
+        if self._stale_cols:
+            characters = [(key, self._storage.get_character_stats(key)) for key in self._characters]
+            for col in self._stale_cols:
+                tool_stats = self._tool(self._tools[col])
+                self.table[:len(characters), col] = [damage_multiplier(k, c, tool_stats) for k, c in characters]
+            self._stale_cols.clear()
+
+    def on_load(self, storage) -> None:
+        """Rebuild the table from the stores."""
+        self._reset()
+        self._storage = storage
+        for key in storage.character_stats:
+            self._add_row(key)
+        for key in storage.tool_stats:
+            self._add_col(key)
+
+    def on_change(self, store: str, key: Hashable, record: Optional[object]) -> None:
+        """Mark a character's row or a tool's column as stale."""
+        if self._storage is None:
+            return
+        if store == "character_stats":
+            row = self.rows.get(key)
+            if row is None:
+                self._add_row(key)
+            else:
+                self._stale_rows.add(row)
+        elif store == "tool_stats":
+            col = self.cols.get(key)
+            if col is None:
+                self._add_col(key)
+            else:
+                self._stale_cols.add(col)
+
+    def lookup(self, character: str, tool: Optional[str]) -> float:
+        """Damage of one character-tool pair."""
+        row = self.rows.get(character)
+        if row is None:
+            # No stats means a count of 0
+            return damage_multiplier(character, CharacterStats(), self._tool(tool))
+        self._refresh()
+        return float(self.table[row, self.cols.get(tool, 0)])
+
+    def lookup_many(self, pairs: Sequence[Tuple[str, Optional[str]]]) -> List[float]:
+        """Damage of many character-tool pairs with one indexed read."""
+        if any(character not in self.rows for character, _ in pairs):
+            return [self.lookup(character, tool) for character, tool in pairs]
+        self._refresh()
+        rows = [self.rows[character] for character, _ in pairs]
+        cols = [self.cols.get(tool, 0) for _, tool in pairs]
+        return self.table[rows, cols].tolist()
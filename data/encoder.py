@@ -0,0 +1,63 @@
+import json
+from dataclasses import asdict
+from typing import Any, Dict, Iterable, Optional
+
+def _encode_key(key: Any) -> str:
+    """Encode a dict key the way json.dump does (non-string keys become strings)."""
+    if not isinstance(key, str):
+        key = json.dumps(key)
+    return json.dumps(key)
+
+def encode_fragment(record: Any) -> str:
+    """Encode one entity as it appears nested one level deep in an indent=2 file."""
+    return json.dumps(asdict(record), indent=2).replace("\n", "\n  ")
+
+def stitch(fragments: Dict[str, str]) -> str:
+    """Join cached fragments into a document identical to json.dump(..., indent=2)."""
+    if not fragments:
+        return "{}"
+    body = ",\n".join(f"  {key}: {fragment}" for key, fragment in fragments.items())
+    return "{\n" + body + "\n}"
+
+class FragmentEncoder:
+    """
+    Caches each entity's encoded JSON so a save only re-encodes what changed.
+
+    Fragments are keyed by the already-encoded dict key, so stitch() can
+    build the file without touching the stats objects.
+    """
+
+    def __init__(self):
+        self._fragments: Dict[str, Dict[Any, str]] = {}
+        self._encoded_keys: Dict[Any, str] = {}
+
+    def clear(self) -> None:
+        """Drop every cached fragment."""
+        self._fragments.clear()
+
+    def encode(self, store: str, records: Dict[Any, Any], changed: Optional[Iterable[Any]] = None) -> Dict[str, str]:
+        """
+        Return encoded-key -> fragment for every record in a store.
+
+        Only keys in changed (and any record without a cached fragment) are
+        re-encoded. The returned dict is a copy the caller may hand to
+        another thread.
+        """
+        fragments = self._fragments.setdefault(store, {})
+        for key in changed or ():
+            if key in records:
+                fragments[key] = encode_fragment(records[key])
+            else:
+                fragments.pop(key, None)
+        if len(fragments) != len(records):
+            for key in records.keys() - fragments.keys():
+                fragments[key] = encode_fragment(records[key])
+            for key in fragments.keys() - records.keys():
+                del fragments[key]
+        return {self._key(key): fragments[key] for key in records}
+
+    def _key(self, key: Any) -> str:
+        encoded = self._encoded_keys.get(key)
+        if encoded is None:
+            encoded = self._encoded_keys[key] = _encode_key(key)
+        return encoded
@@ -0,0 +1,101 @@
+import random
+from typing import Any, Dict, Generic, Hashable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T', bound=Hashable)
+
+class IndexedSet(Generic[T]):
+    """A set with O(1) add, discard and random choice."""
+
+    def __init__(self):
+        self.items: List[T] = []
+        self.positions: Dict[T, int] = {}
+
+    def add(self, item: T) -> None:
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def discard(self, item: T) -> None:
+        position = self.positions.pop(item, None)
+        if position is None:
+            return
+        last = self.items.pop()
+        if last != item:
+            self.items[position] = last
+            self.positions[last] = position
+
+    def choice(self) -> T:
+        """Get a random item."""
+        if not self.items:
+            raise IndexError("Cannot choose from an empty set")
+        return random.choice(self.items)
+
+    def sample(self, n: int, replace: bool = False) -> List[T]:
+        """Get n random items. Without replacement, at most len(self) are returned."""
+        if replace:
+            if not self.items:
+                raise IndexError("Cannot choose from an empty set")
+            return random.choices(self.items, k=n)
+        return random.sample(self.items, min(n, len(self.items)))
+
+    def __contains__(self, item: T) -> bool:
+        return item in self.positions
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.items)
+
+class GroupTotals:
+    """
+    Running per-group sums of numeric fields, e.g. rolls per character group.
+
+    Registered as a DataStorage listener. Each key's last contribution is
+    remembered so a mutation moves only that key's values between groups;
+    reading every group's totals is O(groups).
+    """
+
+    def __init__(self, store: str, field: str, fields: Tuple[str, ...]):
+        self.store = store
+        self.field = field
+        self.fields = fields
+        # group -> {"members": n, field: total, ...}
+        self.totals: Dict[Any, Dict[str, Any]] = {}
+        self._contribution: Dict[str, Tuple[Any, Tuple[Any, ...]]] = {}
+
+    def _apply(self, group: Any, values: Tuple[Any, ...], sign: int) -> None:
+        totals = self.totals.get(group)
+        if totals is None:
+            totals = self.totals[group] = dict.fromkeys(("members",) + self.fields, 0)
+        totals["members"] += sign
+        for name, value in zip(self.fields, values):
+            totals[name] += sign * value
+        if not totals["members"]:
+            del self.totals[group]
+
+    def _move(self, key: str, record: Optional[Any]) -> None:
+        old = self._contribution.pop(key, None)
+        if old is not None:
+            self._apply(*old, -1)
+        if record is not None:
+            new = (getattr(record, self.field), tuple(getattr(record, name) for name in self.fields))
+            self._contribution[key] = new
+            self._apply(*new, 1)
+
+    def on_load(self, storage) -> None:
+        """Rebuild the totals from the store."""
+        self.totals = {}
+        self._contribution = {}
+        for key, record in getattr(storage, self.store).items():
+            self._move(key, record)
+
+    def on_change(self, store: str, key: str, record: Optional[Any]) -> None:
+        """Move one key's contribution to its record's current group and values."""
+        if store == self.store:
+            self._move(key, record)
+
+    def get(self, group: Any) -> Dict[str, Any]:
+        """Get one group's totals (all zero for an empty group)."""
+        totals = self.totals.get(group)
+        return dict(totals) if totals is not None else dict.fromkeys(("members",) + self.fields, 0)
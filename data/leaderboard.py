@@ -0,0 +1,110 @@
+from bisect import bisect_left, insort
+from dataclasses import fields
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import CharacterStats, UserStats
+
+def _numeric_fields(cls: type) -> List[str]:
+    return [f.name for f in fields(cls) if f.type in (int, float)]
+
+# Metric name -> (store, field), for every numeric field of the ranked models
+METRICS: Dict[str, Tuple[str, str]] = {
+    f"{entity}.{name}": (store, name)
+    for entity, store, cls in (
+        ("character", "character_stats", CharacterStats),
+        ("user", "user_stats", UserStats)
+    )
+    for name in _numeric_fields(cls)
+}
+
+class SortedIndex:
+    """
+    Keys of one store ordered by a numeric field, highest first.
+
+    Entries are (-value, key) in a sorted list, so ties are ordered by
+    key. rank() is O(log n) and top() O(log n + k), but an update is a
+    binary search plus a list insert/delete, which shifts the entries
+    after it: O(n), as one memmove of pointers. That is microseconds at
+    this bot's store sizes; a balanced tree would only pay off far beyond.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.entries: List[Tuple[Any, str]] = []
+        self._value_of: Dict[str, Any] = {}
+
+    def update(self, key: str, record: Optional[Any]) -> None:
+        """Re-place one key after its record changed (or drop it if record is None)."""
+        old = self._value_of.pop(key, None)
+        if old is not None:
+            del self.entries[bisect_left(self.entries, (-old, key))]
+        if record is not None:
+            value = getattr(record, self.field)
+            self._value_of[key] = value
+            insort(self.entries, (-value, key))
+
+    def top(self, k: int, offset: int = 0) -> List[Tuple[str, Any]]:
+        """Get (key, value) pairs ranked offset+1 to offset+k."""
+        return [(key, -value) for value, key in self.entries[offset:offset + k]]
+
+    def leaders(self) -> Tuple[List[str], Any]:
+        """Get every key tied for the highest value, and that value."""
+        if not self.entries:
+            return [], 0
+        best = self.entries[0][0]
+        keys = []
+        for value, key in self.entries:
+            if value != best:
+                break
+            keys.append(key)
+        return keys, -best
+
+    def rank(self, key: str) -> Optional[int]:
+        """Get a key's 1-based rank; tied keys share the best rank."""
+        value = self._value_of.get(key)
+        if value is None:
+            return None
+        return bisect_left(self.entries, (-value,)) + 1
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+class Leaderboards:
+    """
+    Lazily built SortedIndex per metric, kept current as a DataStorage listener.
+
+    An index is only created the first time its metric is queried; from
+    then on every mutation of its store updates it in place.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.indexes: Dict[str, SortedIndex] = {}
+
+    def on_load(self, storage) -> None:
+        self.indexes = {}
+
+    def on_change(self, store: str, key: str, record: Optional[Any]) -> None:
+        for metric, index in self.indexes.items():
+            if METRICS[metric][0] == store:
+                index.update(key, record)
+
+    def index(self, metric: str) -> SortedIndex:
+        """Get the index for a metric such as "character.count", building it if needed."""
+        index = self.indexes.get(metric)
+        if index is None:
+            store, field = METRICS[metric]
+            index = SortedIndex(field)
+            for key, record in getattr(self.storage, store).items():
+                index.update(key, record)
+            self.indexes[metric] = index
+        return index
+
+    def top(self, metric: str, k: int, offset: int = 0) -> List[Tuple[str, Any]]:
+        return self.index(metric).top(k, offset)
+
+    def leaders(self, metric: str) -> Tuple[List[str], Any]:
+        return self.index(metric).leaders()
+
+    def rank(self, metric: str, key: str) -> Optional[int]:
+        return self.index(metric).rank(key)
@@ -1,12 +1,24 @@
+import sys
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, FrozenSet, List, Optional, Union
 from enum import Enum
 
+# String fields that repeat across many records; storage interns them on write
+INTERNED_FIELDS: FrozenSet[str] = frozenset({"group", "favorite_weapon", "deck"})
+
+def intern_value(value: Any) -> Any:
+    """Intern a string (or each string in a list) so repeated values share memory."""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return [sys.intern(v) if isinstance(v, str) else v for v in value]
+    return value
+
 class RaidMode(Enum):
     CAMPAIGN = "campaign"
     CLASSIC = "classic"
 
-@dataclass
+@dataclass(slots=True)
 class CharacterStats:
     count: int = 0
     group: str = "_unsorted"
@@ -17,7 +29,11 @@ class CharacterStats:
     pvp_wins: int = 0
     is_1_0: bool = False
 
-@dataclass
+    def __post_init__(self):
+        self.group = intern_value(self.group)
+        self.favorite_weapon = intern_value(self.favorite_weapon)
+
+@dataclass(slots=True)
 class BossStats:
     health: float
     weakness: str
@@ -26,13 +42,16 @@ class BossStats:
     wake_message: str = ""
     campaign_id: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class ToolStats:
     default_multiplier: float = 1.0
     group: str = "None"
     character_multipliers: Dict[str, float] = field(default_factory=dict)
 
-@dataclass
+    def __post_init__(self):
+        self.group = intern_value(self.group)
+
+@dataclass(slots=True)
 class UserStats:
     total_rolls: int = 0
     highest_damage: int = 0
@@ -46,7 +65,10 @@ class UserStats:
     pvp_wins: int = 0
     cursed: bool = False
 
-@dataclass
+    def __post_init__(self):
+        self.deck = intern_value(self.deck)
+
+@dataclass(slots=True)
 class ServerStats:
     active_raid: bool = False
     total_rolls: int = 0
@@ -0,0 +1,68 @@
+import os
+import sys
+import marshal
+from dataclasses import fields
+from typing import Any, Dict, Optional, Tuple
+
+from config.config import BOOT_SNAPSHOT_FILE
+from .backends import STORE_MODELS, atomic_write
+
+FORMAT_VERSION = 1
+
+def _layout() -> Dict[str, Tuple[str, ...]]:
+    """Field names of every model, in constructor order."""
+    return {store: tuple(f.name for f in fields(cls)) for store, cls in STORE_MODELS.items()}
+
+def write_boot_snapshot(stores: Dict[str, Dict[str, Any]], backend_name: str) -> None:
+    """
+    Write every store as marshalled tuples of field values.
+
+    The snapshot is only read back if it is at least as new as the backend's
+    own files, so a crash (which skips writing it) falls back to the backend.
+    """
+    layout = _layout()
+    snapshot = {
+        "version": FORMAT_VERSION,
+        "python": sys.version_info[:2],
+        "backend": backend_name,
+        "layout": layout,
+        "stores": {
+            store: {
+                key: tuple(getattr(record, name) for name in layout[store])
+                for key, record in records.items()
+            }
+            for store, records in stores.items()
+        }
+    }
+    atomic_write(BOOT_SNAPSHOT_FILE, marshal.dumps(snapshot))
+
+def read_boot_snapshot(backend_name: str, newer_than: Optional[int]) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Load stores from the boot snapshot, or return None if it is missing,
+    stale, or was written for a different backend or model layout.
+    """
+    if newer_than is None:
+        return None
+    try:
+        if os.stat(BOOT_SNAPSHOT_FILE).st_mtime_ns < newer_than:
+            return None
+        with open(BOOT_SNAPSHOT_FILE, 'rb') as f:
+            snapshot = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+    # A corrupt file can unmarshal to anything, so check the shape before trusting it
+    if (not isinstance(snapshot, dict) or
+        snapshot.get("version") != FORMAT_VERSION or
+        snapshot.get("python") != sys.version_info[:2] or
+        snapshot.get("backend") != backend_name or
+        snapshot.get("layout") != _layout()):
+        return None
+
+    try:
+        return {
+            store: {key: cls(*values) for key, values in snapshot["stores"][store].items()}
+            for store, cls in STORE_MODELS.items()
+        }
+    except (KeyError, TypeError, AttributeError):
+        return None
@@ -1,43 +1,66 @@
-import json
-from pathlib import Path
-from typing import Dict, Optional, TypeVar, Type, Any
+import copy
+import time
+import asyncio
+from contextlib import contextmanager
 from dataclasses import asdict
+from typing import Dict, Iterator, List, Optional, Set, Tuple, TypeVar, Type, Any, Union
 
 from config.config import (
-    CHARACTER_STATS_FILE,
-    BOSS_STATS_FILE,
-    TOOL_STATS_FILE,
-    USER_STATS_FILE,
-    SERVER_STATS_FILE
+    STORAGE_BACKEND,
+    SAVE_INTERVAL,
+    SAVE_MUTATION_THRESHOLD,
+    DAMAGE_TABLE
 )
-from .models import CharacterStats, BossStats, ToolStats, UserStats, ServerStats
+from .models import CharacterStats, BossStats, ToolStats, UserStats, ServerStats, INTERNED_FIELDS, intern_value
+from .backends import STORE_MODELS, create_backend
+from .writer import StorageWriter
+from .encoder import FragmentEncoder
+from .snapshot import read_boot_snapshot, write_boot_snapshot
+from .indexes import GroupTotals
+from .damage import DamageTable, np
+from .leaderboard import Leaderboards
+from .activity import ActivityCounters
 
 T = TypeVar('T')
 
 class DataStorage:
-    def __init__(self):
+    # Entity name used by update/increment/transaction -> (store attribute, model)
+    ENTITIES: Dict[str, Tuple[str, type]] = {
+        "character": ("character_stats", CharacterStats),
+        "boss": ("boss_stats", BossStats),
+        "tool": ("tool_stats", ToolStats),
+        "user": ("user_stats", UserStats),
+        "server": ("server_stats", ServerStats)
+    }
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else create_backend(STORAGE_BACKEND)
+        self.writer = StorageWriter(self.backend)
+        self.encoder = FragmentEncoder()
         self.character_stats: Dict[str, CharacterStats] = {}
         self.boss_stats: Dict[str, BossStats] = {}
         self.tool_stats: Dict[str, ToolStats] = {}
         self.user_stats: Dict[str, UserStats] = {}
         self.server_stats: Dict[str, ServerStats] = {}
-        self.load_all()
-
-    def _load_json_file(self, file_path: Path) -> dict:
-        """Load a JSON file, creating an empty one if it doesn't exist."""
-        try:
-            with open(file_path, 'r', encoding='utf8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(file_path, 'w', encoding='utf8') as f:
-                json.dump({}, f)
-            return {}
-
-    def _save_json_file(self, file_path: Path, data: dict) -> None:
-        """Save data to a JSON file."""
-        with open(file_path, 'w', encoding='utf8') as f:
-            json.dump(data, f, indent=2)
+
+        # Write-behind state: store name -> keys changed since the last flush (None: the whole store)
+        self._dirty: Dict[str, Optional[Set[str]]] = {}
+        self._pending_mutations = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        self.activity = ActivityCounters()
+        # Store name -> counter bumped on every mutation and load (see version)
+        self.versions: Dict[str, int] = dict.fromkeys(STORE_MODELS, 0)
+
+        # Indexes kept in sync with the stores (see add_listener)
+        self._listeners: List[Any] = []
+        self.group_totals = GroupTotals("character_stats", "group", ("count", "raids_won", "raids_completed", "pvp_wins"))
+        self.add_listener(self.group_totals)
+        self.leaderboards = Leaderboards(self)
+        self.add_listener(self.leaderboards)
+        self.damage: Optional[DamageTable] = None
+        if DAMAGE_TABLE and np is not None:
+            self.damage = DamageTable()
+            self.add_listener(self.damage)
 
     def _convert_dict_to_dataclass(self, data: dict, cls: Type[T]) -> T:
         """Convert a dictionary to a dataclass instance."""
@@ -46,129 +69,384 @@ class DataStorage:
         return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
 
     def load_all(self) -> None:
-        """Load all data from JSON files."""
-        # Load character stats
-        char_data = self._load_json_file(CHARACTER_STATS_FILE)
-        self.character_stats = {
-            k: self._convert_dict_to_dataclass(v, CharacterStats) 
-            for k, v in char_data.items()
-        }
-
-        # Load boss stats
-        boss_data = self._load_json_file(BOSS_STATS_FILE)
-        self.boss_stats = {
-            k: self._convert_dict_to_dataclass(v, BossStats)
-            for k, v in boss_data.items()
-        }
-
-        # Load tool stats
-        tool_data = self._load_json_file(TOOL_STATS_FILE)
-        self.tool_stats = {
-            k: self._convert_dict_to_dataclass(v, ToolStats)
-            for k, v in tool_data.items()
-        }
-
-        # Load user stats
-        user_data = self._load_json_file(USER_STATS_FILE)
-        self.user_stats = {
-            k: self._convert_dict_to_dataclass(v, UserStats)
-            for k, v in user_data.items()
-        }
-
-        # Load server stats
-        server_data = self._load_json_file(SERVER_STATS_FILE)
-        self.server_stats = {
-            k: self._convert_dict_to_dataclass(v, ServerStats)
-            for k, v in server_data.items()
-        }
+        """Load all data, preferring the boot snapshot when it is current."""
+        start = time.perf_counter()
+        # Make sure queued writes land before reading them back
+        self.writer.drain()
+        backend_name = type(self.backend).__name__
+
+        stores = read_boot_snapshot(backend_name, self.backend.last_modified())
+        if stores is not None:
+            source = "boot snapshot"
+            for server_stats in stores["server_stats"].values():
+                server_stats.active_raid = False
+        else:
+            source = backend_name
+            all_data = self.backend.load_all()
+            stores = {
+                store: {
+                    k: self._convert_dict_to_dataclass(v, cls)
+                    for k, v in all_data[store].items()
+                }
+                for store, cls in STORE_MODELS.items()
+            }
+
+        for store, records in stores.items():
+            setattr(self, store, records)
+            self.versions[store] += 1
+        print(f"Loaded stats from {source} in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        # Write out queued counters first so the reload doesn't lose them
+        self.activity.save()
+        self.activity.load()
+        self.encoder.clear()
+        self._dirty.clear()
+        self._pending_mutations = 0
+        for listener in self._listeners:
+            listener.on_load(self)
+
+    def add_listener(self, listener: Any) -> None:
+        """
+        Keep an index in sync with the stores.
+
+        listener.on_load(storage) is called after every load_all, and
+        listener.on_change(store, key, record) after every mutation, with
+        record None if the key was removed.
+        """
+        self._listeners.append(listener)
+
+    def version(self, *stores: str) -> Tuple[int, ...]:
+        """
+        Get the mutation counters of some stores. A result that compares
+        equal to an earlier one means none of those stores changed since.
+        """
+        return tuple(self.versions[store] for store in stores)
+
+    def _touch(self, store: str, key: Optional[str]) -> None:
+        """
+        Notify listeners of a change and queue the key for the next flush.
+        With key None the whole store is queued and listeners are rebuilt.
+        """
+        self.versions[store] += 1
+        if key is None:
+            self._dirty[store] = None
+            for listener in self._listeners:
+                listener.on_load(self)
+            return
+        keys = self._dirty.setdefault(store, set())
+        if keys is not None:
+            keys.add(key)
+        record = getattr(self, store).get(key)
+        for listener in self._listeners:
+            listener.on_change(store, key, record)
+
+    def _snapshot(self, store: str, keys: Optional[Set[str]] = None) -> Dict[str, dict]:
+        """Copy a store's records (or just keys) into data the writer thread can own."""
+        records = getattr(self, store)
+        if self.backend.full_rewrite:
+            # Without keys every record may have changed, so re-encode them all
+            return self.encoder.encode(store, records, keys if keys is not None else records.keys())
+        if keys is None:
+            return {k: asdict(v) for k, v in records.items()}
+        return {k: asdict(records[k]) for k in keys if k in records}
 
     def save_all(self) -> None:
-        """Save all data to JSON files."""
-        self._save_json_file(CHARACTER_STATS_FILE, {k: asdict(v) for k, v in self.character_stats.items()})
-        self._save_json_file(BOSS_STATS_FILE, {k: asdict(v) for k, v in self.boss_stats.items()})
-        self._save_json_file(TOOL_STATS_FILE, {k: asdict(v) for k, v in self.tool_stats.items()})
-        self._save_json_file(USER_STATS_FILE, {k: asdict(v) for k, v in self.user_stats.items()})
-        self._save_json_file(SERVER_STATS_FILE, {k: asdict(v) for k, v in self.server_stats.items()})
-
-    def get_character_stats(self, name: str) -> Optional[CharacterStats]:
-        if name not in self.character_stats:
-            self.character_stats[name] = CharacterStats()
+        """Save all data to the storage backend."""
+        self.encoder.clear()
+        for store in STORE_MODELS:
+            self.writer.submit(store, self._snapshot(store))
+        self._dirty.clear()
+        self._pending_mutations = 0
+
+    def mark_dirty(self, store: str, key: Optional[str] = None) -> None:
+        """
+        Record that a store changed so the next flush writes it.
+
+        Callers that mutate a stats object in place (rather than through an
+        update_* method) must call this themselves. Without a key the whole
+        store is rewritten and every index rebuilt, so pass the key when
+        only one record changed.
+        """
+        self._touch(store, key)
+        self._pending_mutations += 1
+        if self._pending_mutations >= SAVE_MUTATION_THRESHOLD:
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand every dirty store to the writer thread, coalescing all pending mutations."""
+        for store, keys in list(self._dirty.items()):
+            self.writer.submit(store, self._snapshot(store, keys), set(keys) if keys is not None else None)
+        self._dirty.clear()
+        self._pending_mutations = 0
+        self.activity.save(background=True)
+
+    async def _flush_loop(self) -> None:
+        """Periodically flush dirty stores in the background."""
+        while True:
+            await asyncio.sleep(SAVE_INTERVAL)
+            if self._dirty:
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"Error flushing stats: {e}")
+
+    def start_flusher(self) -> None:
+        """Start the background flusher on the running event loop."""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    def close(self) -> None:
+        """Stop the background flusher and write any pending changes."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self.flush()
+        self.activity.save()
+        self.writer.close()
+        self.backend.close()
+        # Written last so it is newer than every file the backend touched
+        if self.backend.last_modified() is not None:
+            write_boot_snapshot(
+                {store: getattr(self, store) for store in STORE_MODELS},
+                type(self.backend).__name__
+            )
+
+    def peek(self, entity: str, key: str) -> Optional[Any]:
+        """Get the stored object for an entity, or None. Never creates a record."""
+        return getattr(self, self.ENTITIES[entity][0]).get(key)
+
+    def peek_character_stats(self, name: str) -> Optional[CharacterStats]:
+        """Get stats for a character by name, or None if it has none."""
+        return self.character_stats.get(name)
+
+    def peek_boss_stats(self, name: str) -> Optional[BossStats]:
+        """Get stats for a boss by name, or None if it has none."""
+        return self.boss_stats.get(name)
+
+    def peek_tool_stats(self, name: str) -> Optional[ToolStats]:
+        """Get stats for a tool by name, or None if it has none."""
+        return self.tool_stats.get(name)
+
+    def peek_user_stats(self, name: str) -> Optional[UserStats]:
+        """Get stats for a user by name, or None if it has none."""
+        return self.user_stats.get(name)
+
+    def peek_server_stats(self, name: str) -> Optional[ServerStats]:
+        """Get stats for a server by name, or None if it has none."""
+        return self.server_stats.get(name)
+
+    # The get_* methods below return a default object for unknown names
+    # without storing it; only update/increment/transactions create records.
+
+    def get_character_stats(self, name: str) -> CharacterStats:
         """Get stats for a character by name."""
-        return self.character_stats.get(name.casefold())
+        stats = self.character_stats.get(name.casefold())
+        return stats if stats is not None else CharacterStats()
 
     def get_boss_stats(self, name: str) -> Optional[BossStats]:
-        """Get stats for a boss by name."""
-        if name not in self.boss_stats:
-            self.boss_stats[name] = BossStats()
+        """Get stats for a boss by name. Bosses have no defaults, so unknown names return None."""
         return self.boss_stats.get(name)
 
-    def get_tool_stats(self, name: str) -> Optional[ToolStats]:
+    def get_tool_stats(self, name: str) -> ToolStats:
         """Get stats for a tool by name."""
-        if name not in self.tool_stats:
-            self.tool_stats[name] = ToolStats()
-        return self.tool_stats.get(name)
+        stats = self.tool_stats.get(name)
+        return stats if stats is not None else ToolStats()
 
-    def get_user_stats(self, name: str) -> Optional[UserStats]:
+    def get_user_stats(self, name: str) -> UserStats:
         """Get stats for a user by name."""
-        if name not in self.user_stats:
-            self.user_stats[name] = UserStats()
-        return self.user_stats.get(name)
+        stats = self.user_stats.get(name)
+        return stats if stats is not None else UserStats()
 
-    def get_server_stats(self, name: str) -> Optional[ServerStats]:
+    def get_server_stats(self, name: str) -> ServerStats:
         """Get stats for a server by name."""
-        if name not in self.server_stats:
-            self.server_stats[name] = ServerStats()
-        return self.server_stats.get(name)
+        stats = self.server_stats.get(name)
+        return stats if stats is not None else ServerStats()
+
+    def remove(self, entity: str, key: str) -> bool:
+        """Delete an entity's record. Returns False if it had none."""
+        store = self.ENTITIES[entity][0]
+        if getattr(self, store).pop(key, None) is None:
+            return False
+        self.mark_dirty(store, key)
+        return True
+
+    def sweep_defaults(self, keep: Dict[str, Set[str]]) -> Dict[str, int]:
+        """
+        Remove records still equal to their model's defaults.
+
+        These are left behind by older versions, whose lookups inserted a
+        default record for any name they were asked about. keep maps an
+        entity name to keys that must survive even if they are defaults
+        (e.g. characters that have an image but haven't been rolled yet).
+        Returns the number of records removed per entity.
+        """
+        removed = {}
+        for entity, (store, cls) in self.ENTITIES.items():
+            try:
+                default = cls()
+            except TypeError:
+                # Models with required fields (bosses) are never created implicitly
+                continue
+            protected = keep.get(entity, set())
+            phantoms = [
+                key for key, record in getattr(self, store).items()
+                if record == default and key not in protected
+            ]
+            for key in phantoms:
+                self.remove(entity, key)
+            removed[entity] = len(phantoms)
+        return removed
+
+    def _record(self, entity: str, key: str) -> Any:
+        """Get the stored object for an entity, creating a default one if needed."""
+        store, cls = self.ENTITIES[entity]
+        records = getattr(self, store)
+        if key not in records:
+            records[key] = cls()
+        return records[key]
+
+    def _commit(self, ops: List[Tuple[str, str, str, str, Any]], events: List[Tuple[str, str, str]] = ()) -> None:
+        """Apply a transaction's operations and count them as one mutation."""
+        touched = {}
+        for op, entity, key, field_name, value in ops:
+            _apply_op(self._record(entity, key), op, field_name, value)
+            touched[(self.ENTITIES[entity][0], key)] = None
+            if op == "inc":
+                self.activity.on_increment(entity, key, field_name, value)
+        for entity, key, kind in events:
+            self.activity.record(entity, key, kind)
+        for store, key in touched:
+            self._touch(store, key)
+        if ops:
+            self._pending_mutations += 1
+            if self._pending_mutations >= SAVE_MUTATION_THRESHOLD:
+                self.flush()
+
+    @contextmanager
+    def transaction(self) -> Iterator["Transaction"]:
+        """
+        Collect the mutations of one game event and apply them together.
+
+        Changes are staged while the block runs and applied, with a single
+        persistence step, when it exits. If the block raises, nothing is applied.
+        """
+        txn = Transaction(self)
+        yield txn
+        txn.commit()
+
+    def update(self, entity: str, key: str, **kwargs: Any) -> None:
+        """Set fields on an entity, ignoring names the model doesn't have."""
+        _apply_op(self._record(entity, key), "set", None, kwargs)
+        self.mark_dirty(self.ENTITIES[entity][0], key)
+
+    def increment(self, entity: str, key: str, field_name: str, delta: Union[int, float] = 1) -> Union[int, float]:
+        """Add delta to a numeric field and return the new value."""
+        record = self._record(entity, key)
+        _apply_op(record, "inc", field_name, delta)
+        self.activity.on_increment(entity, key, field_name, delta)
+        self.mark_dirty(self.ENTITIES[entity][0], key)
+        return getattr(record, field_name)
+
+    def max_update(self, entity: str, key: str, field_name: str, value: Union[int, float]) -> Union[int, float]:
+        """Raise a field to value if value is larger and return the resulting value."""
+        record = self._record(entity, key)
+        if _apply_op(record, "max", field_name, value):
+            self.mark_dirty(self.ENTITIES[entity][0], key)
+        return getattr(record, field_name)
 
     def update_character_stats(self, name: str, **kwargs: Any) -> None:
         """Update stats for a character."""
-        if name not in self.character_stats:
-            self.character_stats[name] = CharacterStats()
-        char_stats = self.character_stats[name]
-        for k, v in kwargs.items():
-            if hasattr(char_stats, k):
-                setattr(char_stats, k, v)
-        self.save_all()
+        self.update("character", name, **kwargs)
 
     def update_tool_stats(self, name: str, **kwargs: Any) -> None:
         """Update stats for a tool."""
-        if name not in self.tool_stats:
-            self.tool_stats[name] = ToolStats()
-        tool_stat = self.tool_stats[name]
-        for k, v in kwargs.items():
-            if hasattr(tool_stat, k):
-                setattr(tool_stat, k, v)
-        self.save_all()
+        self.update("tool", name, **kwargs)
 
     def update_user_stats(self, name: str, **kwargs: Any) -> None:
         """Update stats for a user."""
-        if name not in self.user_stats:
-            self.user_stats[name] = UserStats()
-        user_stats = self.user_stats[name]
-        for k, v in kwargs.items():
-            if hasattr(user_stats, k):
-                setattr(user_stats, k, v)
-        self.save_all()
+        self.update("user", name, **kwargs)
 
     def update_boss_stats(self, boss: str, **kwargs: Any)-> None:
         """Updates boss stats"""
-        if boss not in self.boss_stats:
-            self.boss_stats[boss] = BossStats()
-        boss_stats = self.boss_stats[boss]
-        for k, v in kwargs.items():
-            if hasattr(boss_stats, k):
-                setattr(boss_stats, k, v)
-        self.save_all()
+        self.update("boss", boss, **kwargs)
     
     def update_server_stats(self, name: str, **kwargs: Any) -> None:
         """Update stats for a server."""
-        if name not in self.server_stats:
-            self.server_stats[name] = ServerStats()
-        server_stats = self.server_stats[name]
-        for k, v in kwargs.items():
-            if hasattr(server_stats, k):
-                setattr(server_stats, k, v)
-        self.save_all()
+        self.update("server", name, **kwargs)
+
+def _apply_op(record: Any, op: str, field_name: Optional[str], value: Any) -> bool:
+    """Apply a single staged operation to a stats object. Returns True if it changed."""
+    if op == "set":
+        for k, v in value.items():
+            if hasattr(record, k):
+                setattr(record, k, intern_value(v) if k in INTERNED_FIELDS else v)
+        return True
+    current = getattr(record, field_name)
+    if op == "inc":
+        setattr(record, field_name, current + value)
+        return True
+    if op == "max":
+        if value > current:
+            setattr(record, field_name, value)
+            return True
+        return False
+    raise ValueError(f"Unknown storage operation: {op}")
+
+class Transaction:
+    """Staged mutations for one roll, raid or PvP match."""
+
+    def __init__(self, storage: DataStorage):
+        self._storage = storage
+        self._ops: List[Tuple[str, str, str, str, Any]] = []
+        self._views: Dict[Tuple[str, str], Any] = {}
+        self._events: List[Tuple[str, str, str]] = []
+        self._committed = False
+
+    def get(self, entity: str, key: str) -> Any:
+        """Get an entity as it will look once this transaction commits."""
+        ident = (entity, key)
+        if ident not in self._views:
+            store, cls = self._storage.ENTITIES[entity]
+            current = getattr(self._storage, store).get(key)
+            self._views[ident] = copy.deepcopy(current) if current is not None else cls()
+        return self._views[ident]
+
+    def _stage(self, op: str, entity: str, key: str, field_name: Optional[str], value: Any) -> None:
+        if self._committed:
+            raise RuntimeError("Transaction has already been committed")
+        _apply_op(self.get(entity, key), op, field_name, value)
+        self._ops.append((op, entity, key, field_name, value))
+
+    def update(self, entity: str, key: str, **kwargs: Any) -> None:
+        """Stage field assignments for an entity."""
+        self._stage("set", entity, key, None, kwargs)
+
+    def increment(self, entity: str, key: str, field_name: str, delta: Union[int, float] = 1) -> Union[int, float]:
+        """Stage an increment and return the field's pending value."""
+        self._stage("inc", entity, key, field_name, delta)
+        return getattr(self.get(entity, key), field_name)
+
+    def max_update(self, entity: str, key: str, field_name: str, value: Union[int, float]) -> Union[int, float]:
+        """Stage a max update and return the field's pending value."""
+        self._stage("max", entity, key, field_name, value)
+        return getattr(self.get(entity, key), field_name)
+
+    def record(self, entity: str, key: str, kind: str) -> None:
+        """
+        Stage an activity event that no increment stands for, e.g. PvP
+        matches per server. Increments listed in ACTIVITY_EVENTS record
+        their own.
+        """
+        if self._committed:
+            raise RuntimeError("Transaction has already been committed")
+        self._events.append((entity, key, kind))
+
+    def commit(self) -> None:
+        """Apply every staged operation to storage."""
+        if self._committed:
+            return
+        self._committed = True
+        self._storage._commit(self._ops, self._events)
 
 # Global instance
 storage = DataStorage() 
\ No newline at end of file
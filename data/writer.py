@@ -0,0 +1,109 @@
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+# Store name -> (records, keys) waiting to be written
+Batch = Dict[str, Tuple[Dict[str, dict], Optional[Set[str]]]]
+
+class StorageWriter:
+    """
+    Writes store snapshots to a backend on a dedicated thread.
+
+    Snapshots are plain dicts built on the event loop, so the thread never
+    touches live stats objects. Submissions collect in a pending buffer
+    while the thread writes the previous one; a newer snapshot of the same
+    store replaces (or, for key-level backends, merges into) the pending one.
+    A snapshot the backend fails to save is put back under whatever was
+    submitted since, and retried with the next submit (or on close).
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._pending: Batch = {}
+        # Failed snapshots of stores with nothing newer pending, held until the next submit
+        self._failed: Batch = {}
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, store: str, records: Dict[str, dict], keys: Optional[Set[str]] = None) -> None:
+        """Queue a snapshot of a store to be written."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Storage writer is closed")
+            self._retry_failed()
+            self._queue(store, (records, keys))
+            self._cond.notify_all()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="storage-writer", daemon=True)
+                self._thread.start()
+
+    def _combine(
+        self,
+        older: Tuple[Dict[str, dict], Optional[Set[str]]],
+        newer: Tuple[Dict[str, dict], Optional[Set[str]]]
+    ) -> Tuple[Dict[str, dict], Optional[Set[str]]]:
+        """Fold a newer snapshot of a store into an older one."""
+        records, keys = newer
+        if keys is None or self.backend.full_rewrite:
+            return newer
+        older_records, older_keys = older
+        for key in keys:
+            if key in records:
+                older_records[key] = records[key]
+            else:
+                older_records.pop(key, None)
+        return older_records, (older_keys | keys if older_keys is not None else None)
+
+    def _queue(self, store: str, snapshot: Tuple[Dict[str, dict], Optional[Set[str]]]) -> None:
+        pending = self._pending.get(store)
+        self._pending[store] = snapshot if pending is None else self._combine(pending, snapshot)
+
+    def _retry_failed(self) -> None:
+        """Move failed snapshots back into the pending buffer."""
+        for store, snapshot in self._failed.items():
+            self._queue(store, snapshot)
+        self._failed = {}
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                batch, self._pending = self._pending, {}
+                self._busy = True
+            failed: Batch = {}
+            for store, (records, keys) in batch.items():
+                try:
+                    self.backend.save(store, records, keys)
+                except Exception as e:
+                    print(f"Error writing {store}, will retry: {e}")
+                    failed[store] = (records, keys)
+            with self._cond:
+                for store, snapshot in failed.items():
+                    pending = self._pending.get(store)
+                    if pending is not None:
+                        # Newer changes are already queued; write both together
+                        self._pending[store] = self._combine(snapshot, pending)
+                    else:
+                        # Wait for the next submit rather than retrying in a tight loop
+                        self._failed[store] = snapshot
+                self._busy = False
+                self._cond.notify_all()
+
+    def drain(self) -> None:
+        """Block until everything submitted so far has been written."""
+        with self._cond:
+            while self._pending or self._busy:
+                self._cond.wait()
+
+    def close(self) -> None:
+        """Write anything pending and stop the thread."""
+        with self._cond:
+            self._retry_failed()
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
@@ -4,6 +4,7 @@ from pathlib import Path
 from config.config import EVOLUTIONS_DIR
 from data.models import EVOLUTION_RECIPES
 from data.storage import storage
+from utils.assets import catalog
 
 class EvolutionManager:
     @staticmethod
@@ -25,13 +26,13 @@ class EvolutionManager:
     @staticmethod
     def get_evolution_path(evolved_name: str) -> Optional[Path]:
         """Get the path to an evolution's image file."""
-        path = EVOLUTIONS_DIR / f"{evolved_name}.gif"
-        return path if path.exists() else None
+        filename = catalog.evolutions.resolve(evolved_name)
+        return EVOLUTIONS_DIR / filename if filename else None
     
     @staticmethod
     def apply_evolution_bonus(evolved_name: str, total_damage: float) -> float:
         """Apply the evolution's damage multiplier."""
-        tool_stats = storage.get_tool_stats(evolved_name)
+        tool_stats = storage.peek_tool_stats(evolved_name)
         if tool_stats:
             return total_damage * tool_stats.default_multiplier
         return total_damage 
\ No newline at end of file
@@ -5,10 +5,11 @@ import asyncio
 import discord
 
 from config.config import IMAGES_DIR, TOOLS_DIR
-from data.storage import storage
-from game.stats import StatsManager
+from data.storage import storage, Transaction
 from utils.embeds import create_pvp_join_embed, create_pvp_battle_embed
 from utils.helpers import roll_character, roll_tool, calculate_damage_multiplier
+from utils.assets import canonical_name, display_name
+from utils.media import media
 
 class PVPView(discord.ui.View):
     def __init__(self, pvp_manager, timeout: float = 60.0):
@@ -107,88 +108,119 @@ class PVPManager:
             self.is_active = False
             return False
 
+    def _play_rounds(self, txn: Transaction, host_char: str, challenger_char: str) -> List[Tuple[str, str, float, float]]:
+        """
+        Play the best-of-3 rounds, staging the stats in txn. Returns each
+        round's (host tool, challenger tool, host damage, challenger damage).
+        """
+        rounds = []
+        host_wins = challenger_wins = 0
+        while host_wins < 2 and challenger_wins < 2:
+            # Roll tools for the round
+            host_tool = roll_tool()
+            challenger_tool = roll_tool()
+
+            # Calculate damage using helper function
+            host_damage = calculate_damage_multiplier(
+                canonical_name(host_char),
+                display_name(host_tool)
+            )
+            challenger_damage = calculate_damage_multiplier(
+                canonical_name(challenger_char),
+                display_name(challenger_tool)
+            )
+
+            # Update character stats
+            txn.increment("character", canonical_name(host_char), "total_pvp")
+            txn.increment("character", canonical_name(challenger_char), "total_pvp")
+            if host_damage > challenger_damage:
+                host_wins += 1
+                txn.increment("character", canonical_name(host_char), "pvp_wins")
+            else:
+                challenger_wins += 1
+                txn.increment("character", canonical_name(challenger_char), "pvp_wins")
+            rounds.append((host_tool, challenger_tool, host_damage, challenger_damage))
+
+        # Update user stats
+        winner = self.host_name if host_wins > challenger_wins else self.challenger_name
+        txn.increment("user", self.host_name, "total_pvp")
+        txn.increment("user", self.challenger_name, "total_pvp")
+        txn.increment("user", winner, "pvp_wins")
+        if self.channel.guild is not None:
+            txn.record("server", self.channel.guild.name, "pvp")
+        return rounds
+
     async def _conduct_pvp_battle(self) -> None:
         """Conduct the best-of-3 PVP battle."""
         try:
             print("Starting PVP battle")
-            await self.channel.send(f"{self.challenger_name} has accepted the challenge! Battle starting...")
-            await asyncio.sleep(2)  # Longer initial delay
-            
-            # Roll characters for both players and announce them
+            # Roll characters for both players
             host_char = roll_character()
             challenger_char = roll_character()
-            
+            host_power = storage.get_character_stats(canonical_name(host_char)).count
+            challenger_power = storage.get_character_stats(canonical_name(challenger_char)).count
+
+            # The whole match is decided and committed before anything is sent,
+            # so a failed send can't discard the stats of a match players saw
+            with storage.transaction() as txn:
+                rounds = self._play_rounds(txn, host_char, challenger_char)
+
+            await self.channel.send(f"{self.challenger_name} has accepted the challenge! Battle starting...")
+            await asyncio.sleep(2)  # Longer initial delay
+
             # Announce host's character with image
-            await self.channel.send(
-                f"{self.host_name} enters the arena with {host_char.split('.')[0]}. Power Level: {storage.get_character_stats(host_char.split('.')[0].casefold()).count}",
-                file=discord.File(f"{IMAGES_DIR}/{host_char}")
+            await media.send_images(
+                self.channel.send,
+                [IMAGES_DIR / host_char],
+                f"{self.host_name} enters the arena with {display_name(host_char)}. Power Level: {host_power}"
             )
             await asyncio.sleep(3)  # Longer delay between character announcements
-            
+
             # Announce challenger's character with image
-            await self.channel.send(
-                f"{self.challenger_name} enters the arena with {challenger_char.split('.')[0]}. Power Level: {storage.get_character_stats(challenger_char.split('.')[0].casefold()).count}",
-                file=discord.File(f"{IMAGES_DIR}/{challenger_char}")
+            await media.send_images(
+                self.channel.send,
+                [IMAGES_DIR / challenger_char],
+                f"{self.challenger_name} enters the arena with {display_name(challenger_char)}. Power Level: {challenger_power}"
             )
             await asyncio.sleep(3)  # Longer delay before battle starts
-        
-            
-            while self.host_wins < 2 and self.challenger_wins < 2:
+
+            for host_tool, challenger_tool, host_damage, challenger_damage in rounds:
                 self.current_round += 1
                 print(f"Starting round {self.current_round}")
-                
-                # Roll tools for the round
-                host_tool = roll_tool()
-                challenger_tool = roll_tool()
-                
+
                 # Announce tools with images
-                await self.channel.send(
-                    f"{host_char.split('.')[0]} uses {host_tool.split('.')[0]}!",
-                    file=discord.File(f"{TOOLS_DIR}/{host_tool}")
+                await media.send_images(
+                    self.channel.send,
+                    [TOOLS_DIR / host_tool],
+                    f"{display_name(host_char)} uses {display_name(host_tool)}!"
                 )
                 await asyncio.sleep(3)  # Delay between tool announcements
-                
-                await self.channel.send(
-                    f"{challenger_char.split('.')[0]} uses {challenger_tool.split('.')[0]}!",
-                    file=discord.File(f"{TOOLS_DIR}/{challenger_tool}")
+
+                await media.send_images(
+                    self.channel.send,
+                    [TOOLS_DIR / challenger_tool],
+                    f"{display_name(challenger_char)} uses {display_name(challenger_tool)}!"
                 )
                 await asyncio.sleep(2)  # Delay before damage calculation
-                
-                # Calculate damage using helper function
-                host_damage = calculate_damage_multiplier(
-                    host_char.split('.')[0].casefold(),
-                    host_tool.split('.')[0]
-                )
-                challenger_damage = calculate_damage_multiplier(
-                    challenger_char.split('.')[0].casefold(),
-                    challenger_tool.split('.')[0]
-                )
-                
-                # Update character stats
-                storage.update_character_stats(host_char.split('.')[0].casefold(), total_pvp=storage.get_character_stats(host_char.split('.')[0].casefold()).total_pvp+1)
-                storage.update_character_stats(challenger_char.split('.')[0].casefold(), total_pvp=storage.get_character_stats(challenger_char.split('.')[0].casefold()).total_pvp+1)
-                
+
                 # Determine round winner
                 round_winner = self.host_name if host_damage > challenger_damage else self.challenger_name
                 winner_char = host_char if host_damage > challenger_damage else challenger_char
                 winner_damage = host_damage if host_damage > challenger_damage else challenger_damage
-                
                 if host_damage > challenger_damage:
                     self.host_wins += 1
-                    storage.update_character_stats(host_char.split('.')[0].casefold(), pvp_wins=storage.get_character_stats(host_char.split('.')[0].casefold()).pvp_wins+1)
                 else:
                     self.challenger_wins += 1
-                    storage.update_character_stats(challenger_char.split('.')[0].casefold(), pvp_wins=storage.get_character_stats(challenger_char.split('.')[0].casefold()).pvp_wins+1)
-                    
+
                 print(f"Round {self.current_round} winner: {round_winner}")
-                
+
                 # Create and send battle results embed
                 embed = discord.Embed(
                     title=f"Round {self.current_round} Winner: {round_winner}",
-                    description=f"{winner_char.split('.')[0]} deals {winner_damage:.2f} damage!",
+                    description=f"{display_name(winner_char)} deals {winner_damage:.2f} damage!",
                     color=discord.Color.gold()
                 )
-                
+
                 # Add battle stats
                 embed.add_field(
                     name=f"{self.host_name}'s Damage",
@@ -205,32 +237,26 @@ class PVPManager:
                     value=f"{self.host_name}: {self.host_wins} | {self.challenger_name}: {self.challenger_wins}",
                     inline=False
                 )
-                
+
                 # Set the winner's character as the embed image
-                embed.set_thumbnail(url="attachment://winner.png")
-                await self.channel.send(
-                    embed=embed,
-                    file=discord.File(f"{IMAGES_DIR}/{winner_char}", filename="winner.png")
+                await media.send_embed(
+                    self.channel.send,
+                    embed,
+                    IMAGES_DIR / winner_char,
+                    filename="winner.png",
+                    thumbnail=True
                 )
                 await asyncio.sleep(4)  # Longer delay between rounds
-                
-            # Update stats for winner
+
+            # Send final victory message with winner's character
             winner = self.host_name if self.host_wins > self.challenger_wins else self.challenger_name
             winner_char = host_char if self.host_wins > self.challenger_wins else challenger_char
-            StatsManager.increment_pvp_wins(winner)
-            
-            # Update user stats
-            storage.update_user_stats(self.host_name, total_pvp=storage.get_user_stats(self.host_name).total_pvp+1)
-            storage.update_user_stats(self.challenger_name, total_pvp=storage.get_user_stats(self.challenger_name).total_pvp+1)
-            storage.update_user_stats(winner, pvp_wins=storage.get_user_stats(winner).pvp_wins+1)
-            
-            # Send final victory message with winner's character
-            await self.channel.send(
-                f"🏆 {winner} wins the PVP battle with {winner_char.split('.')[0]}!",
-                file=discord.File(f"{IMAGES_DIR}/{winner_char}")
+            await media.send_images(
+                self.channel.send,
+                [IMAGES_DIR / winner_char],
+                f"🏆 {winner} wins the PVP battle with {display_name(winner_char)}!"
             )
-            storage.save_all()
-            
+
         except Exception as e:
             print(f"Error in conduct_pvp_battle: {str(e)}")
             import traceback
@@ -1,5 +1,6 @@
 import asyncio
-from typing import List, Optional, Dict, Union, Tuple
+from functools import partial
+from typing import Any, Awaitable, Callable, List, Optional, Dict, Union, Tuple
 import discord
 from pathlib import Path
 
@@ -18,9 +19,12 @@ from config.config import (
 )
 from config.messages import *
 from data.models import RaidState, RaidHand, RaidMode, EVOLUTION_RECIPES
-from data.storage import storage
-from utils.helpers import roll_character, roll_tool, roll_boss, calculate_damage_multiplier
+from data.storage import storage, Transaction
+from utils.helpers import roll_character, roll_characters, roll_tool, roll_boss, calculate_damage_multiplier, calculate_hand_damage
 from utils.embeds import create_raid_join_embed, create_death_vote_embed
+from utils.assets import catalog, canonical_name, display_name
+from utils.media import media
+from utils.hands import hand_renderer
 
 class JoinRaidButton(discord.ui.View):
     def __init__(self, host: str, *, timeout: int = RAID_TIMEOUT):
@@ -75,7 +79,7 @@ class RaidManager:
             print(f"Boss rolled: {boss}")
             
             print("Getting boss stats...")
-            self.boss_name = boss.split(".")[0]
+            self.boss_name = display_name(boss)
             self.boss_stats = storage.get_boss_stats(self.boss_name)
             print(f"Boss stats retrieved: {self.boss_stats}")
             
@@ -170,24 +174,25 @@ class RaidManager:
             storage.update_server_stats(self.server_name, active_raid=False)
             return False
 
-    async def draw_cards(self) -> None:
+    async def draw_cards(self, txn: Transaction) -> None:
         """Draw cards for all players in the raid."""
         evolution_check = []
+        hands = []
         
         for player in self.raid_state.player_list:
-            storage.update_user_stats(player, total_raids=storage.get_user_stats(player).total_raids+1)
+            txn.increment("user", player, "total_raids")
             # Draw character and tool
             character = roll_character(revealed_only=True)
             tool = roll_tool()
-            evolution_check.append(tool.split('.')[0])
+            evolution_check.append(display_name(tool))
+            hands.append((player, character, tool))
             
-            # Calculate damage
-            damage = calculate_damage_multiplier(
-                character.split('.')[0].casefold(),
-                tool.split('.')[0]
-            )
-            
-            # Create hand
+        # Calculate every hand's damage at once
+        damages = calculate_hand_damage([
+            (canonical_name(character), display_name(tool))
+            for _, character, tool in hands
+        ])
+        for (player, character, tool), damage in zip(hands, damages):
             self.raid_state.player_data[player] = RaidHand(
                 character=character,
                 tool=tool,
@@ -199,8 +204,8 @@ class RaidManager:
             if recipe[0] in evolution_check and recipe[1] in evolution_check:
                 self.raid_state.player_data["evolutions_FLAG"] = (evolved, recipe[0], recipe[1])
 
-    async def process_special_tools(self, ctx: discord.ext.commands.Context, player: str, hand: RaidHand) -> List[discord.File]:
-        """Process special tool effects."""
+    async def process_special_tools(self, ctx: discord.ext.commands.Context, player: str, hand: RaidHand) -> List[Path]:
+        """Process special tool effects. Returns the images of the extra cards drawn."""
         files = []
         
         if hand.tool == 'backup.jpg':
@@ -211,13 +216,13 @@ class RaidManager:
                     character=backup_character,
                     tool=backup_tool,
                     damage_index=calculate_damage_multiplier(
-                        backup_character.split('.')[0].casefold(),
-                        backup_tool.split('.')[0]
+                        canonical_name(backup_character),
+                        display_name(backup_tool)
                     )
                 )
                 files.extend([
-                    discord.File(f"{IMAGES_DIR}/{backup_hand.character}"),
-                    discord.File(f"{TOOLS_DIR}/{backup_hand.tool}")
+                    IMAGES_DIR / backup_hand.character,
+                    TOOLS_DIR / backup_hand.tool
                 ])
                 hand.damage_index += backup_hand.damage_index
             except Exception as e:
@@ -225,35 +230,21 @@ class RaidManager:
                 
         elif hand.tool == 'convoy.jpg':
             try:
-                for _ in range(5):
-                    convoy_character = roll_character()
-                    convoy_hand = RaidHand(
-                        character = convoy_character,
-                        tool=None,
-                        damage_index=calculate_damage_multiplier(
-                            convoy_character.split('.')[0].casefold(),
-                            None
-                        )
-                    )
-                    files.append(discord.File(f"{IMAGES_DIR}/{convoy_hand.character}"))
-                    hand.damage_index += convoy_hand.damage_index
+                convoy_characters = roll_characters(5)
+                damages = calculate_hand_damage([(canonical_name(c), None) for c in convoy_characters])
+                for convoy_character, damage in zip(convoy_characters, damages):
+                    files.append(IMAGES_DIR / convoy_character)
+                    hand.damage_index += damage
             except Exception as e:
                 print(f"Convoy tool failed: {e}")
                 
         elif hand.tool == 'Call of the wild.png':
             try:
-                for _ in range(5):
-                    character = roll_character(lambda c: storage.get_character_stats(c).group == "non human")
-                    wild_hand = RaidHand(
-                        character=character,
-                        tool=None,
-                        damage_index=calculate_damage_multiplier(
-                            character.split('.')[0].casefold(),
-                            None
-                        )
-                    )
-                    files.append(discord.File(f"{IMAGES_DIR}/{wild_hand.character}"))
-                    hand.damage_index += wild_hand.damage_index
+                wild_characters = roll_characters(5, group="non human")
+                damages = calculate_hand_damage([(canonical_name(c), None) for c in wild_characters])
+                for character, damage in zip(wild_characters, damages):
+                    files.append(IMAGES_DIR / character)
+                    hand.damage_index += damage
             except Exception as e:
                 print(f"Call of the Wild failed: {e}")
                 
@@ -261,7 +252,29 @@ class RaidManager:
 
     async def process_raid_results(self, ctx: discord.ext.commands.Context) -> None:
         """Process and display raid results."""
-        await self.draw_cards()
+        try:
+            # Stats are committed before anything is sent, so a failed send can't discard them
+            with storage.transaction() as txn:
+                announcements = await self._resolve_raid(ctx, txn)
+            for announce in announcements:
+                await announce()
+        finally:
+            # Cleanup
+            storage.update_server_stats(self.server_name, active_raid=False)
+
+    async def _send_hand(self, ctx: discord.ext.commands.Context, hand_files: List[Path], content: str) -> None:
+        """Send a hand as one rendered image, or as its card images if it can't be rendered."""
+        hand_image = await hand_renderer.render_async(hand_files)
+        await media.send_images(ctx.send, [hand_image] if hand_image is not None else hand_files, content)
+
+    async def _resolve_raid(self, ctx: discord.ext.commands.Context, txn: Transaction) -> List[Callable[[], Awaitable[Any]]]:
+        """
+        Play out the raid, staging every stat change in txn. Nothing is
+        sent here; the messages are returned, in order, to be sent once
+        txn has committed.
+        """
+        announcements: List[Callable[[], Awaitable[Any]]] = []
+        await self.draw_cards(txn)
         raid_damage = 0
         hand_files = []
         groups = []
@@ -269,25 +282,24 @@ class RaidManager:
         # Process each player's hand
         for player, data in self.raid_state.player_data.items():
             if player == "evolutions_FLAG":
-                await ctx.send(
-                    EVOLUTION_UNLOCK.format(tool1=data[1], tool2=data[2]),
-                    file=discord.File(f"{EVOLUTIONS_DIR}/{data[0]}.gif")
-                )
+                announcements.append(partial(
+                    media.send_images,
+                    ctx.send,
+                    [catalog.evolutions.path_for(data[0]) or EVOLUTIONS_DIR / f"{data[0]}.gif"],
+                    EVOLUTION_UNLOCK.format(tool1=data[1], tool2=data[2])
+                ))
                 raid_damage *= storage.get_tool_stats(data[0]).default_multiplier
                 break
 
             if isinstance(data, RaidHand):
                 # Update character stats
-                char_name = data.character.split(".")[0].casefold()
-                storage.update_character_stats(
-                    char_name,
-                    raids_completed=storage.get_character_stats(char_name).raids_completed+1
-                )
+                char_name = canonical_name(data.character)
+                txn.increment("character", char_name, "raids_completed")
 
                 # Add base hand files
                 hand_files = [
-                    discord.File(f"{IMAGES_DIR}/{data.character}"),
-                    discord.File(f"{TOOLS_DIR}/{data.tool}")
+                    IMAGES_DIR / data.character,
+                    TOOLS_DIR / data.tool
                 ]
 
                 # Track groups for combo
@@ -302,26 +314,23 @@ class RaidManager:
                 # Check weakness
                 if (self.raid_state.boss_weakness == char_stats.group or
                     self.raid_state.boss_weakness == char_name or
-                    self.raid_state.boss_weakness == data.tool.split('.')[0]):
-                    await ctx.send(RAID_WEAKNESS.format(weakness=self.raid_state.boss_weakness))
+                    self.raid_state.boss_weakness == display_name(data.tool)):
+                    announcements.append(partial(ctx.send, RAID_WEAKNESS.format(weakness=self.raid_state.boss_weakness)))
                     data.damage_index *= 2
 
                 # Display hand
-                await ctx.send(
-                    f"{player}'s hand, dealing {round(data.damage_index, 2)} damage:",
-                    files=hand_files
-                )
+                announcements.append(partial(
+                    self._send_hand, ctx, hand_files, f"{player}'s hand, dealing {round(data.damage_index, 2)} damage:"
+                ))
                 
                 # Update stats
-                storage.update_user_stats(
-                    player,
-                    total_damage=storage.get_user_stats(player).total_damage+round(data.damage_index, 2),
-                    highest_damage=storage.get_user_stats(player).highest_damage if round(data.damage_index, 2) < storage.get_user_stats(player).highest_damage else round(data.damage_index, 2),
-                )
-                storage.update_user_stats(player, average_damage=round(storage.get_user_stats(player).total_damage/storage.get_user_stats(player).total_raids, 2))
+                hand_damage = round(data.damage_index, 2)
+                txn.increment("user", player, "total_damage", hand_damage)
+                txn.max_update("user", player, "highest_damage", hand_damage)
+                user_stats = txn.get("user", player)
+                txn.update("user", player, average_damage=round(user_stats.total_damage/user_stats.total_raids, 2))
                 raid_damage += round(data.damage_index, 0)
-                hand_files.clear()
-                await asyncio.sleep(5)
+                announcements.append(partial(asyncio.sleep, 5))
 
         # Process group combos
         if len(groups) != len(set(groups)):
@@ -332,104 +341,91 @@ class RaidManager:
                 groups_check = set()
                 combo_groups = [g for g in groups if g in groups_check or groups_check.add(g)]
                 groups_string = ", ".join(combo_groups)
-                await ctx.send(RAID_GROUP_COMBO.format(groups=groups_string, combo=combo))
+                announcements.append(partial(ctx.send, RAID_GROUP_COMBO.format(groups=groups_string, combo=combo)))
             except:
-                await ctx.send(RAID_GROUP_COMBO.format(groups=combo, combo=combo))
+                announcements.append(partial(ctx.send, RAID_GROUP_COMBO.format(groups=combo, combo=combo)))
                 
             raid_damage *= combo
 
         # Display boss
-        await ctx.send(file=discord.File(f"{BOSSES_DIR}/{self.raid_state.boss}"))
-        storage.update_server_stats(self.server_name, total_raids=storage.get_server_stats(self.server_name).total_raids+1)
+        announcements.append(partial(media.send_images, ctx.send, [BOSSES_DIR / self.raid_state.boss]))
+        txn.increment("server", self.server_name, "total_raids")
 
         # Process outcome
         if self.raid_state.boss_health > raid_damage:
-            if self.raid_state.boss.split(".")[0] == "death":
-                await ctx.send(RAID_DEATH_DEFEAT)
-                await self.process_death_vote(ctx)
+            if display_name(self.raid_state.boss) == "death":
+                announcements.append(partial(ctx.send, RAID_DEATH_DEFEAT))
+                announcements.append(partial(self.process_death_vote, ctx))
             else:
-                await ctx.send(
+                announcements.append(partial(
+                    ctx.send,
                     RAID_DEFEAT.format(
-                        boss=self.raid_state.boss.split(".")[0],
+                        boss=display_name(self.raid_state.boss),
                         health=int(self.raid_state.boss_health - raid_damage),
-                        boss_name=self.raid_state.boss.split(".")[0]
+                        boss_name=display_name(self.raid_state.boss)
                     )
-                )
-                storage.update_boss_stats(
-                    self.raid_state.boss.split(".")[0],
-                    times_won=storage.get_boss_stats(self.raid_state.boss.split(".")[0]).times_won+1
-                )
-                storage.update_server_stats(
-                    self.server_name,
-                    total_damage=storage.get_server_stats(self.server_name).total_damage+raid_damage
-                )
+                ))
+                txn.increment("boss", display_name(self.raid_state.boss), "times_won")
+                txn.increment("server", self.server_name, "total_damage", raid_damage)
         else:
-            await ctx.send(
+            announcements.append(partial(
+                ctx.send,
                 RAID_VICTORY.format(
-                    boss=self.raid_state.boss.split(".")[0],
+                    boss=display_name(self.raid_state.boss),
                     damage=raid_damage
                 )
-            )
+            ))
             
-            boss_name = self.raid_state.boss.split(".")[0]
-            storage.update_boss_stats(boss_name, times_defeated=storage.get_boss_stats(boss_name).times_defeated+1)
-            storage.update_server_stats(
-                self.server_name,
-                raid_wins=storage.get_server_stats(self.server_name).raid_wins+1,
-                total_damage=storage.get_server_stats(self.server_name).total_damage+raid_damage
-            )
+            boss_name = display_name(self.raid_state.boss)
+            txn.increment("boss", boss_name, "times_defeated")
+            txn.increment("server", self.server_name, "raid_wins")
+            txn.increment("server", self.server_name, "total_damage", raid_damage)
 
             if self.mode == RaidMode.CAMPAIGN:
                 if boss_name == "KRYPTIS ZYPHER":
-                    await ctx.send(file=discord.File(f"{ASSETS_DIR}/demise.gif"))
-                    storage.update_server_stats(self.server_name, campaign="death")
+                    announcements.append(lambda: ctx.send(file=discord.File(f"{ASSETS_DIR}/demise.gif")))
+                    txn.update("server", self.server_name, campaign="death")
                     
                 boss_stats = storage.get_boss_stats(boss_name)
                 if boss_stats.campaign_id == "COMPLETE":
-                    storage.update_server_stats(
-                        self.server_name,
-                        campaign=boss_stats.campaign_id,
-                        campaign_completed=storage.get_server_stats(self.server_name).campaign_completed+1
-                    )
-                    self.new_game()
+                    txn.update("server", self.server_name, campaign=boss_stats.campaign_id)
+                    txn.increment("server", self.server_name, "campaign_completed")
+                    self.new_game(txn)
                 else:
-                    storage.update_server_stats(
-                        self.server_name,
-                        campaign=boss_stats.campaign_id
-                    )
+                    txn.update("server", self.server_name, campaign=boss_stats.campaign_id)
 
             # Update player stats
             for player in self.raid_state.player_list:
-                storage.update_user_stats(player, raid_wins=storage.get_user_stats(player).raid_wins+1)
+                txn.increment("user", player, "raid_wins")
                 
             # Update character stats
             for hand in self.raid_state.player_data.values():
                 if isinstance(hand, RaidHand):
-                    char_name = hand.character.split(".")[0].casefold()
-                    storage.update_character_stats(char_name, raids_won=storage.get_character_stats(char_name).raids_won+1)
+                    char_name = canonical_name(hand.character)
+                    txn.increment("character", char_name, "raids_won")
                     
                     if hand.tool:
-                        tool_name = hand.tool.split(".")[0]
-                        tool_stats = storage.get_tool_stats(tool_name)
+                        tool_name = display_name(hand.tool)
+                        tool_stats = txn.get("tool", tool_name)
                         multiplier_increase = (
                             0.20 if self.raid_state.nightmare else
                             0.10 if self.raid_state.hard_mode else
                             0.05
                         )
-                        if tool_stats.character_multipliers.get(char_name):
-                            tool_stats.character_multipliers[char_name] += multiplier_increase
+                        multipliers = dict(tool_stats.character_multipliers)
+                        if multipliers.get(char_name):
+                            multipliers[char_name] += multiplier_increase
                         else: 
-                            tool_stats.character_multipliers[char_name] = (tool_stats.default_multiplier + multiplier_increase)
+                            multipliers[char_name] = (tool_stats.default_multiplier + multiplier_increase)
+                        txn.update("tool", tool_name, character_multipliers=multipliers)
 
-        # Cleanup
-        storage.update_server_stats(self.server_name, active_raid=False)
-        storage.save_all()
+        return announcements
 
-    def new_game(self) -> None:
+    def new_game(self, txn: Transaction) -> None:
         """Start a new game cycle."""
-        for boss_name, stats in storage.boss_stats.items():
+        for boss_name in storage.boss_stats:
             if boss_name != "death":
-                stats.health *= 1.25
+                txn.update("boss", boss_name, health=txn.get("boss", boss_name).health * 1.25)
 
     async def process_death_vote(self, ctx: discord.ext.commands.Context) -> None:
         """Process death vote sequence."""
@@ -1,81 +1,77 @@
 from typing import List, Optional, Tuple, Dict, Union
 from dataclasses import asdict
 
-from data.storage import storage
+from config.config import CHARACTER_GROUPS, TRENDING_WINDOWS
+from data.storage import storage, Transaction
 from data.models import CharacterStats, UserStats, ServerStats
+from utils.assets import canonical_name
+from utils.pool import character_pool
 
 class StatsManager:
     @staticmethod
     def get_most_common_character() -> Tuple[Union[str, List[str]], int]:
         """Get the most commonly rolled character(s)."""
-        max_count = 0
-        max_chars = []
-        
-        for name, stats in storage.character_stats.items():
-            if stats.count > max_count:
-                max_count = stats.count
-                max_chars = [name]
-            elif stats.count == max_count:
-                max_chars.append(name)
-                
+        max_chars, max_count = storage.leaderboards.leaders("character.count")
         return max_chars if len(max_chars) > 1 else max_chars[0], max_count
 
     @staticmethod
     def get_winningest_raider() -> Tuple[Union[str, List[str]], int]:
         """Get the character(s) with the most raid wins."""
-        max_wins = 0
-        max_chars = []
-        
-        for name, stats in storage.character_stats.items():
-            if stats.raids_won > max_wins:
-                max_wins = stats.raids_won
-                max_chars = [name]
-            elif stats.raids_won == max_wins:
-                max_chars.append(name)
-                
+        max_chars, max_wins = storage.leaderboards.leaders("character.raids_won")
         return max_chars if len(max_chars) > 1 else max_chars[0], max_wins
     
     @staticmethod
     def get_top_ten():
-        top_chars = {name: stats.count for name, stats in storage.character_stats.items()}
-        sorted_chars = sorted(top_chars.items(), key=lambda item: item[1], reverse=True)
-        
-        return dict(sorted_chars[:10])
+        return dict(storage.leaderboards.top("character.count", 10))
             
 
     @staticmethod
-    def increment_character_count(name: str) -> int:
+    def get_trending(kind: str, window: str, k: int = 10) -> List[Tuple[str, int]]:
+        """Get the k characters with the most events of a kind (rolls, raids, pvp) in a window."""
+        resolution, buckets = TRENDING_WINDOWS[window]
+        return storage.activity.trending("character", kind, resolution, buckets, k)
+
+    @staticmethod
+    def get_recent_activity(entity: str, key: str, kind: str, window: str) -> int:
+        """Get how many events of a kind a user or server had in a window."""
+        resolution, buckets = TRENDING_WINDOWS[window]
+        return storage.activity.count(entity, key, kind, resolution, buckets)
+
+    @staticmethod
+    def increment_character_count(name: str, txn: Optional[Transaction] = None) -> int:
         """
-        Increment a character's roll count and return status code:
+        Increment a character's roll count (staged in txn, if given) and return status code:
         0 = normal increment
         1 = took the lead
         2 = tied for lead
         100 = first to 100 rolls
         """
-        char_stats = storage.get_character_stats(name)
-        if not char_stats:
-            return 0
-            
-        most_common, count = StatsManager.get_most_common_character()
-        char_stats.count += 1
-        storage.save_all()
+        leader = storage.leaderboards.top("character.count", 1)
+        count = leader[0][1] if leader else 0
+        new_count = (txn or storage).increment("character", name, "count")
         
-        if char_stats.count > count:
+        if new_count > count and new_count == 100:
+            return 100
+        elif new_count > count:
             return 1
-        elif char_stats.count == count:
+        elif new_count == count:
             return 2
-        elif char_stats.count > count and char_stats.count == 100:
-            return 100
             
         return 0
 
     @staticmethod
     def get_character_group_members(group: str) -> List[str]:
         """Get all characters in a specific group."""
-        return [
-            name for name, stats in storage.character_stats.items()
-            if stats.group == group
-        ]
+        return [canonical_name(filename) for filename in character_pool.pool(revealed_only=False, group=group)]
+
+    @staticmethod
+    def get_group_totals() -> Dict[str, Dict[str, int]]:
+        """Get member count, rolls, raids won/completed and PVP wins for every group."""
+        totals = {group: storage.group_totals.get(group) for group in CHARACTER_GROUPS}
+        for group, group_totals in storage.group_totals.totals.items():
+            if group not in totals:
+                totals[group] = dict(group_totals)
+        return totals
 
     @staticmethod
     def get_user_ex_cards(name: str) -> List[str]:
@@ -99,34 +95,12 @@ class StatsManager:
     def increment_pvp_wins(name: str) -> int:
         """Increment a user's PVP win count."""
         print(f"Incrementing PVP wins for {name}")
-        stats = storage.get_user_stats(name)
-        
-        if not stats:
-            stats = UserStats(name)
-            
-        if not hasattr(stats, 'pvp_wins'):
-            stats.pvp_wins = 1
-            
-        stats.pvp_wins += 1
-        storage.update_user_stats(name)
-        return stats.pvp_wins
+        return storage.increment("user", name, "pvp_wins")
         
     @staticmethod
     def get_pvp_champion() -> Tuple[Union[str, List[str]], int]:
         """Returns the user(s) with the most PVP wins and their win count."""
-        max_wins = 0
-        champions = []
-        
-        for name, stats in storage.user_stats.items():
-            if not hasattr(stats, 'pvp_wins'):
-                continue
-                
-            if stats.pvp_wins > max_wins:
-                max_wins = stats.pvp_wins
-                champions = [name]
-            elif stats.pvp_wins == max_wins:
-                champions.append(name)
-                
+        champions, max_wins = storage.leaderboards.leaders("user.pvp_wins")
         if len(champions) == 1:
             return champions[0], max_wins
-        return champions, max_wins 
\ No newline at end of file
+        return champions, max_wins
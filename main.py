@@ -1,5 +1,4 @@
 import os
-import random
 import asyncio
 import discord
 from discord.ext import commands
@@ -11,10 +10,15 @@ from config.config import (
     IMAGES_DIR,
     ASSETS_DIR,
     EX_DIR,
-    ALLOWED_IMAGE_EXTENSIONS
+    IMAGE_CACHE_WARMUP
 )
 from data.storage import storage
 from game.stats import StatsManager
+from utils.assets import catalog, canonical_name
+from utils.media import image_bytes, media
+from utils.variants import variants
+from utils.embeds import response_cache
+from utils import sampling
 
 # Load environment variables
 load_dotenv()
@@ -45,68 +49,57 @@ async def roll(ctx: commands.Context):
     """Roll a random character."""
     try:
         user_stats = storage.get_user_stats(ctx.author.name)
-        # Get all valid image files
-        all_files = os.listdir(IMAGES_DIR)
-        valid_files = [
-            file for file in all_files
-            if file.endswith(ALLOWED_IMAGE_EXTENSIONS)
-        ]
-        
-        if not valid_files:
+        if not catalog.characters:
             await ctx.send("No valid images found!")
             return
             
-        # Roll for EX card (1/777 chance)
-        if random.randint(1, 777) == 777:
-            ex_files = [
-                file for file in os.listdir(f"{IMAGES_DIR}/EX")
-                if file.endswith('.gif')
-            ]
-            if ex_files:
-                ex_card = random.choice(ex_files)
-                name = ex_card.split('.')[0].casefold()
+        # Roll for EX card (odds set by RARITY_WEIGHTS)
+        if sampling.rarity.draw() == "EX":
+            if catalog.ex:
+                ex_card = catalog.ex.choice()
+                name = canonical_name(ex_card)
                 
                 # Update stats
                 storage.update_user_stats(
                     ctx.author.name,
-                    deck=user_stats.deck.append(name)
+                    deck=user_stats.deck + [name]
                 )
 
-                await ctx.reply(
-                    "An EX card has been unleashed!",
-                    file=discord.File(f"{EX_DIR}/EX/{ex_card}")
+                await media.send_images(
+                    ctx.reply,
+                    [EX_DIR / ex_card],
+                    "An EX card has been unleashed!"
                 )
                 print(f"\n{ctx.author.name} has rolled an EX\n")
                 return
                 
         # Normal roll
-        random_image = random.choice(valid_files)
-        name = random_image.split('.')[0].casefold()
+        random_image = sampling.characters.draw()
+        name = canonical_name(random_image)
         
         # Check for special characters
-        if name == 'the unholy trinity':
-            if not user_stats.cursed:
-                await ctx.send(
-                    f"<@{ctx.author.id}> has been cursed!",
-                    file=discord.File(f"{ASSETS_DIR}/assets/curse.gif")
-                )
-                storage.update_user_stats(ctx.author.name, cursed=True)
-                
-        elif name == 'the holy trinity':
-            if user_stats.cursed:
-                await ctx.send(
-                    f"<@{ctx.author.id}>'s curse has been lifted!",
-                    file=discord.File(f"{ASSETS_DIR}/assets/curse lifted.gif")
-                )
-                storage.update_user_stats(ctx.author.name, cursed=False)
-                
-        # Send image and update stats
-        await ctx.reply(file=discord.File(f"{IMAGES_DIR}/{random_image}"))
-        status = StatsManager.increment_character_count(name)
-        
-        storage.update_user_stats(ctx.author.name, total_rolls=user_stats.total_rolls + 1)
-        storage.update_server_stats(ctx.guild.name, total_rolls=user_stats.total_rolls + 1)
-        
+        curse_message = None
+        if name == 'the unholy trinity' and not user_stats.cursed:
+            curse_message = (f"<@{ctx.author.id}> has been cursed!", f"{ASSETS_DIR}/assets/curse.gif")
+        elif name == 'the holy trinity' and user_stats.cursed:
+            curse_message = (f"<@{ctx.author.id}>'s curse has been lifted!", f"{ASSETS_DIR}/assets/curse lifted.gif")
+
+        # Update stats as one change, before anything is sent
+        with storage.transaction() as txn:
+            if curse_message is not None:
+                txn.update("user", ctx.author.name, cursed=not user_stats.cursed)
+            status = StatsManager.increment_character_count(name, txn)
+            txn.increment("user", ctx.author.name, "total_rolls")
+            if ctx.guild is not None:
+                txn.increment("server", ctx.guild.name, "total_rolls")
+
+        if curse_message is not None:
+            text, gif = curse_message
+            await ctx.send(text, file=discord.File(gif))
+
+        # Send image
+        await media.send_images(ctx.reply, [IMAGES_DIR / random_image])
+
         # Handle status messages
         if status == 1:
             await ctx.send(f"{name} has taken the lead!")
@@ -131,12 +124,22 @@ async def main():
     """Main entry point."""
     # Load data
     storage.load_all()
+    storage.start_flusher()
+    if IMAGE_CACHE_WARMUP:
+        paths = (catalog.characters.path_for(name) for name in StatsManager.get_top_ten())
+        image_bytes.warm(variants.resolve(path) for path in paths if path is not None)
     
     # Load extensions
     await load_extensions()
     
     # Start bot
-    await bot.start(DISCORD_TOKEN)
+    try:
+        await bot.start(DISCORD_TOKEN)
+    finally:
+        # Flush pending stats on shutdown
+        storage.close()
+        print(f"Image cache: {image_bytes.stats()}")
+        print(f"Response cache: {response_cache.stats()}")
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
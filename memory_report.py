@@ -0,0 +1,68 @@
+import gc
+import json
+import random
+import tracemalloc
+from dataclasses import make_dataclass, fields
+
+from config.config import CHARACTER_GROUPS
+from data.models import CharacterStats, UserStats
+
+# Compare the memory used by the slotted, interned stat models against the
+# old plain-dataclass layout. Records are round-tripped through JSON first,
+# like they are when the bot loads its data files.
+
+def legacy_layout(cls):
+    """Rebuild a model as a plain dataclass with a per-instance __dict__ and no interning."""
+    return make_dataclass(f"Legacy{cls.__name__}", [(f.name, f.type, f) for f in fields(cls)])
+
+def sample_users(count: int) -> str:
+    users = {
+        f"user{i}": {
+            "total_rolls": random.randint(0, 5000),
+            "highest_damage": random.randint(0, 90000),
+            "average_damage": random.random() * 1000,
+            "total_damage": random.randint(0, 10 ** 6),
+            "total_raids": random.randint(0, 300),
+            "raid_wins": random.randint(0, 100),
+            "deck": random.sample(["gold alex", "holo tipp", "shiny david", "ex gorb"], random.randint(0, 3)),
+            "total_pvp": random.randint(0, 50),
+            "pvp_wins": random.randint(0, 25),
+            "cursed": random.random() < 0.1
+        }
+        for i in range(count)
+    }
+    return json.dumps(users)
+
+def sample_characters(count: int) -> str:
+    characters = {
+        f"character{i}": {
+            "count": random.randint(0, 120),
+            "group": random.choice(CHARACTER_GROUPS),
+            "raids_won": random.randint(0, 60),
+            "raids_completed": random.randint(0, 120),
+            "favorite_weapon": random.choice(["None", "convoy", "backup", "the gorb"])
+        }
+        for i in range(count)
+    }
+    return json.dumps(characters)
+
+def measure(cls, raw: str) -> int:
+    """Bytes allocated to hold the decoded records as cls instances."""
+    gc.collect()
+    tracemalloc.start()
+    records = {k: cls(**v) for k, v in json.loads(raw).items()}
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return size
+
+random.seed(0)
+print(f"{'records':>22} {'old (MB)':>10} {'new (MB)':>10} {'saved':>7}")
+for cls, sampler in ((UserStats, sample_users), (CharacterStats, sample_characters)):
+    legacy = legacy_layout(cls)
+    for count in (10_000, 100_000):
+        raw = sampler(count)
+        old = measure(legacy, raw)
+        new = measure(cls, raw)
+        label = f"{count:,} {cls.__name__}"
+        print(f"{label:>22} {old / 2**20:>10.1f} {new / 2**20:>10.1f} {1 - new / old:>7.0%}")
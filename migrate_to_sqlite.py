@@ -0,0 +1,9 @@
+from config.config import SQLITE_DB_FILE
+from data.backends import migrate_json_to_sqlite
+
+# Copy the JSON stat files into the SQLite database. Run once, then set
+# STORAGE_BACKEND=sqlite in your .env to switch the bot over.
+counts = migrate_json_to_sqlite()
+for store, count in counts.items():
+    print(f"{store}: {count} records")
+print(f"Migrated to {SQLITE_DB_FILE}")
@@ -0,0 +1,17 @@
+import os
+
+from config.config import IMAGES_DIR, TOOLS_DIR
+from data.storage import storage
+
+# Remove the default records that older lookups inserted for every name they
+# were asked about. Characters and tools that still have an image are kept.
+# Stop the bot before running this, since both would write the same files.
+storage.load_all()
+keep = {
+    "character": {os.path.splitext(f)[0].casefold() for f in os.listdir(IMAGES_DIR)},
+    "tool": {os.path.splitext(f)[0] for f in os.listdir(TOOLS_DIR)},
+}
+removed = storage.sweep_defaults(keep)
+storage.close()
+for entity, count in removed.items():
+    print(f"{entity}: removed {count} default records")
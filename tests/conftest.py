@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Run from anywhere: the bot's packages live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import data.snapshot
+from data.backends import STORE_MODELS, JsonBackend
+from data.storage import DataStorage
+
+@pytest.fixture
+def json_backend(tmp_path, monkeypatch):
+    """JsonBackend writing to tmp_path instead of data/."""
+    monkeypatch.setattr(JsonBackend, "STORE_FILES", {store: tmp_path / f"{store}.json" for store in STORE_MODELS})
+    return JsonBackend
+
+@pytest.fixture
+def isolated_storage(tmp_path, monkeypatch, json_backend):
+    """A loaded DataStorage whose files (stats, boot snapshot, activity log) all live in tmp_path."""
+    monkeypatch.setattr(data.snapshot, "BOOT_SNAPSHOT_FILE", tmp_path / "snapshot.bin")
+    storage = DataStorage(backend=json_backend())
+    storage.activity.path = tmp_path / "activity.log"
+    storage.load_all()
+    yield storage
+    storage.writer.close()
@@ -0,0 +1,82 @@
+import random
+
+from data.activity import ActivityCounters
+
+START = 1_700_000_000.0
+
+def make_counters(tmp_path, now):
+    return ActivityCounters(tmp_path / "activity.log", clock=lambda: now[0])
+
+def brute_count(events, now, key, width, buckets):
+    current = int(now // width)
+    return sum(n for t, k, n in events if k == key and int(t // width) > current - buckets)
+
+def test_windows_match_brute_force(tmp_path):
+    now = [START]
+    counters = make_counters(tmp_path, now)
+    events = []
+    rng = random.Random(1)
+    for _ in range(5000):
+        now[0] += rng.randint(0, 1200)
+        key, n = f"c{rng.randint(0, 20)}", rng.randint(1, 3)
+        counters.record("character", key, "rolls", n)
+        events.append((now[0], key, n))
+
+    for resolution, width, buckets in [("minute", 60, 60), ("hour", 3600, 1), ("hour", 3600, 24), ("day", 86400, 7), ("day", 86400, 30)]:
+        for key in ("c0", "c7", "c20"):
+            assert counters.count("character", key, "rolls", resolution, buckets) == brute_count(events, now[0], key, width, buckets)
+
+    expected = sorted((brute_count(events, now[0], f"c{i}", 86400, 7) for i in range(21)), reverse=True)[:5]
+    assert [n for _, n in counters.trending("character", "rolls", "day", 7, 5)] == expected
+
+def test_old_buckets_expire(tmp_path):
+    now = [START]
+    counters = make_counters(tmp_path, now)
+    counters.record("user", "player", "raids", 4)
+    now[0] += 2 * 3600
+    assert counters.count("user", "player", "raids", "hour", 1) == 0
+    assert counters.count("user", "player", "raids", "hour", 3) == 4
+    now[0] += 31 * 86400
+    assert counters.count("user", "player", "raids", "day", 30) == 0
+
+def test_only_mapped_increments_count():
+    counters = ActivityCounters(clock=lambda: START)
+    counters.on_increment("user", "player", "total_rolls", 2)
+    counters.on_increment("user", "player", "raid_wins", 1)
+    counters.on_increment("user", "player", "total_rolls", -1)
+    assert counters.count("user", "player", "rolls") == 2
+    assert counters.count("user", "player", "raids") == 0
+
+def test_save_and_load_round_trip(tmp_path):
+    now = [START]
+    counters = make_counters(tmp_path, now)
+    counters.record("server", "guild", "pvp", 3)
+    counters.save()
+    counters.record("server", "guild", "pvp", 2)
+    counters.save(background=True)
+
+    reloaded = make_counters(tmp_path, now)
+    counters.drain()
+    reloaded.load()
+    assert reloaded.count("server", "guild", "pvp") == 5
+
+def test_failed_write_does_not_block_and_is_retried(tmp_path):
+    now = [START]
+    counters = make_counters(tmp_path, now)
+    append = counters._append
+
+    def fail(batch):
+        raise OSError("disk full")
+
+    counters._append = fail
+    counters.record("user", "player", "rolls", 1)
+    counters.save()
+    counters.save()
+    counters.load()
+    assert counters.count("user", "player", "rolls") == 1
+
+    counters._append = append
+    counters.save()
+    reloaded = make_counters(tmp_path, now)
+    reloaded.load()
+    assert reloaded.count("user", "player", "rolls") == 1
@@ -0,0 +1,96 @@
+from dataclasses import asdict
+
+import pytest
+
+from data.backends import JournalBackend, SqliteBackend
+from data.encoder import FragmentEncoder
+from data.models import CharacterStats, ServerStats, UserStats
+
+def sample_stores():
+    return {
+        "character_stats": {
+            "alex": CharacterStats(count=12, group="alexcon", raids_won=3, raids_completed=5, is_1_0=True),
+            "bob": CharacterStats(count=1)
+        },
+        "boss_stats": {},
+        "tool_stats": {},
+        "user_stats": {"player": UserStats(total_rolls=40, deck=["alex ex"])},
+        "server_stats": {"guild": ServerStats(total_rolls=40)}
+    }
+
+def raw(stores):
+    return {store: {k: asdict(v) for k, v in records.items()} for store, records in stores.items()}
+
+@pytest.fixture(params=["json", "sqlite", "journal"])
+def make_backend(request, tmp_path, json_backend):
+    """A factory, so each test can reopen the same files as a restart would."""
+    factories = {
+        "json": json_backend,
+        "sqlite": lambda: SqliteBackend(tmp_path / "stats.db"),
+        # Tiny segments, so saves roll and compact segments too
+        "journal": lambda: JournalBackend(tmp_path / "journal", segment_bytes=200, compact_segments=2)
+    }
+    return factories[request.param]
+
+def save(backend, store, records, keys=None):
+    if backend.full_rewrite:
+        backend.save(store, FragmentEncoder().encode(store, records), keys)
+    else:
+        backend.save(store, {k: asdict(v) for k, v in records.items()}, keys)
+
+def test_round_trip(make_backend):
+    stores = sample_stores()
+    backend = make_backend()
+    for store, records in stores.items():
+        save(backend, store, records)
+    backend.close()
+
+    reopened = make_backend()
+    assert reopened.load_all() == raw(stores)
+    reopened.close()
+
+def test_changed_and_deleted_keys(make_backend):
+    stores = sample_stores()
+    backend = make_backend()
+    for store, records in stores.items():
+        save(backend, store, records)
+
+    characters = stores["character_stats"]
+    characters["alex"].count += 1
+    del characters["bob"]
+    characters["carl"] = CharacterStats(group="duos")
+    save(backend, "character_stats", characters, {"alex", "bob", "carl"})
+    backend.close()
+
+    reopened = make_backend()
+    assert reopened.load("character_stats") == raw(stores)["character_stats"]
+    reopened.close()
+
+def test_journal_skips_torn_tail(tmp_path, json_backend):
+    backend = JournalBackend(tmp_path / "journal")
+    save(backend, "character_stats", sample_stores()["character_stats"])
+    backend._segment.write('["character_stats","alex",{"cou')
+    backend._segment.flush()
+
+    assert JournalBackend(tmp_path / "journal").load("character_stats") == raw(sample_stores())["character_stats"]
+
+def test_empty_journal_is_seeded_from_json(tmp_path, json_backend):
+    stores = sample_stores()
+    json_store = json_backend()
+    for store, records in stores.items():
+        save(json_store, store, records)
+
+    journal = JournalBackend(tmp_path / "journal")
+    assert journal.load_all() == raw(stores)
+    save(journal, "character_stats", {"bob": CharacterStats(count=2)}, {"bob"})
+    journal.close()
+
+    # Seeded once only: later JSON changes don't override the journal
+    save(json_store, "character_stats", {})
+    stores["character_stats"]["bob"].count = 2
+    assert JournalBackend(tmp_path / "journal").load_all() == raw(stores)
+
+def test_empty_journal_without_json_starts_empty(tmp_path, json_backend):
+    journal = JournalBackend(tmp_path / "journal")
+    assert journal.load_all() == raw({store: {} for store in sample_stores()})
+    assert not (tmp_path / "journal" / JournalBackend.SNAPSHOT_NAME).exists()
@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from data.damage import damage_multiplier
+from data.models import CharacterStats, ToolStats
+
+pytest.importorskip("numpy")
+
+def expected(storage, character, tool):
+    tool_stats = storage.tool_stats.get(tool) if tool is not None else None
+    return damage_multiplier(character, storage.get_character_stats(character), tool_stats or ToolStats())
+
+def test_table_matches_scalar_damage_through_changes(isolated_storage):
+    storage = isolated_storage
+    rng = random.Random(5)
+    groups = ["duos", "squads", "_unsorted"]
+    for i in range(40):
+        storage.update("character", f"c{i}", count=rng.randint(0, 50), group=rng.choice(groups))
+    for i in range(10):
+        storage.update("tool", f"t{i}", default_multiplier=rng.uniform(0.5, 3), group=rng.choice(groups))
+    storage.mark_dirty("character_stats")
+    assert storage.damage is not None
+
+    characters = [f"c{i}" for i in range(45)]  # c40-c44 have no stats
+    tools = [f"t{i}" for i in range(12)] + [None]  # t10, t11 have no stats
+    for step in range(200):
+        # Mutate between lookups: counts, groups, multipliers, new rows and columns
+        action = rng.randrange(4)
+        if action == 0:
+            storage.increment("character", rng.choice(characters), "count", rng.randint(1, 3))
+        elif action == 1:
+            storage.update("character", rng.choice(characters), group=rng.choice(groups))
+        elif action == 2:
+            tool = rng.choice(tools[:-1])
+            multipliers = {rng.choice(characters): rng.uniform(1, 2)}
+            storage.update("tool", tool, character_multipliers=multipliers, default_multiplier=rng.uniform(0.5, 3))
+        else:
+            storage.remove("character", rng.choice(characters))
+
+        pairs = [(rng.choice(characters), rng.choice(tools)) for _ in range(5)]
+        assert storage.damage.lookup_many(pairs) == [expected(storage, c, t) for c, t in pairs]
+        character, tool = pairs[0]
+        assert storage.damage.lookup(character, tool) == expected(storage, character, tool)
+
+def test_group_match_doubles_damage():
+    character = CharacterStats(count=2, group="duos")
+    assert damage_multiplier("alex", character, ToolStats(default_multiplier=1.5, group="duos")) == 60
+    assert damage_multiplier("alex", character, ToolStats(default_multiplier=1.5, character_multipliers={"alex": 2})) == 40
@@ -0,0 +1,50 @@
+import random
+
+import game.stats
+from config.config import CHARACTER_GROUPS
+from game.stats import StatsManager
+
+FIELDS = ("count", "raids_won", "raids_completed", "pvp_wins")
+
+def brute_totals(records):
+    totals = {}
+    for record in records.values():
+        group = totals.setdefault(record.group, dict.fromkeys(("members",) + FIELDS, 0))
+        group["members"] += 1
+        for name in FIELDS:
+            group[name] += getattr(record, name)
+    return totals
+
+def test_totals_match_brute_force(isolated_storage):
+    storage = isolated_storage
+    rng = random.Random(4)
+    groups = ["duos", "squads", "quans", "_unsorted"]
+    for step in range(500):
+        key = f"c{rng.randrange(40)}"
+        action = rng.randrange(5)
+        if action == 0:
+            storage.update("character", key, group=rng.choice(groups))
+        elif action == 1:
+            storage.remove("character", key)
+        else:
+            with storage.transaction() as txn:
+                txn.increment("character", key, rng.choice(FIELDS), rng.randint(1, 4))
+        if step % 100 == 0:
+            assert storage.group_totals.totals == brute_totals(storage.character_stats)
+    assert storage.group_totals.totals == brute_totals(storage.character_stats)
+
+    # A whole-store reload rebuilds them
+    storage.character_stats.clear()
+    storage.mark_dirty("character_stats")
+    assert storage.group_totals.totals == {}
+
+def test_every_configured_group_is_listed(isolated_storage, monkeypatch):
+    monkeypatch.setattr(game.stats, "storage", isolated_storage)
+    isolated_storage.update("character", "alex", group="duos", count=3)
+    isolated_storage.update("character", "zed", group="not configured", pvp_wins=2)
+
+    totals = StatsManager.get_group_totals()
+    assert set(CHARACTER_GROUPS) <= set(totals)
+    assert totals["duos"] == {"members": 1, "count": 3, "raids_won": 0, "raids_completed": 0, "pvp_wins": 0}
+    assert totals["squads"]["members"] == 0
+    assert totals["not configured"]["pvp_wins"] == 2
@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import utils.assets
+from utils.hands import HandRenderer
+from utils.media import image_bytes, media
+from utils.variants import variants
+
+Image = pytest.importorskip("PIL.Image")
+
+async def fake_send(**kwargs):
+    files = kwargs.get("files", [])
+    return SimpleNamespace(attachments=[
+        SimpleNamespace(url=f"https://cdn.discordapp.com/attachments/1/{i}/{f.filename}?ex=7fffffff")
+        for i, f in enumerate(files)
+    ])
+
+@pytest.fixture
+def cards(tmp_path):
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"card{i}.png"
+        Image.new("RGB", (40, 60), (i * 40, 0, 0)).save(path)
+        paths.append(path)
+    return paths
+
+def test_evicted_hands_leave_no_cache_entries(tmp_path, cards):
+    renderer = HandRenderer(root=tmp_path / "hands", workers=1, max_entries=2)
+    sent = []
+    for i in range(5):
+        hand = renderer.render([cards[i], cards[i + 1]])
+        asyncio.run(media.send_images(fake_send, [hand]))
+        sent.append((hand, utils.assets.content_hash(hand)))
+        assert len(list((tmp_path / "hands").glob("*.jpg"))) <= 2
+
+    for hand, digest in sent[:-2]:
+        assert not hand.exists()
+        assert str(hand) not in utils.assets._digests
+        assert str(hand) not in image_bytes.entries
+        assert not any(key[0] == digest for key in variants._selected)
+        assert not any(key[0] == digest for key in media.urls)
+    for hand, digest in sent[-2:]:
+        assert hand.exists()
+        assert media.url_for(hand) is not None
+
+def test_repeated_hand_is_rendered_once(tmp_path, cards):
+    renderer = HandRenderer(root=tmp_path / "hands", workers=1, max_entries=2)
+    first = renderer.render(cards[:3])
+    mtime = first.stat().st_mtime_ns
+    assert renderer.render(cards[:3]) == first
+    assert first.stat().st_mtime_ns == mtime
+
+def test_leftover_files_count_towards_the_limit(tmp_path, cards):
+    hands = tmp_path / "hands"
+    hands.mkdir()
+    for i in range(3):
+        (hands / f"old{i}.jpg").write_bytes(b"jpeg")
+    renderer = HandRenderer(root=hands, workers=1, max_entries=2)
+    renderer.render(cards[:2])
+    assert len(list(hands.glob("*.jpg"))) == 2
@@ -0,0 +1,61 @@
+import random
+
+from data.leaderboard import METRICS, SortedIndex
+
+def brute_rank(records, field, key):
+    value = getattr(records[key], field)
+    return 1 + sum(getattr(r, field) > value for r in records.values())
+
+def brute_top(records, field):
+    return sorted(((k, getattr(r, field)) for k, r in records.items()), key=lambda item: (-item[1], item[0]))
+
+def test_metrics_cover_numeric_fields():
+    assert METRICS["character.count"] == ("character_stats", "count")
+    assert METRICS["user.pvp_wins"] == ("user_stats", "pvp_wins")
+    assert "character.group" not in METRICS
+
+def test_ranks_and_pages_match_brute_force(isolated_storage):
+    storage = isolated_storage
+    rng = random.Random(11)
+    leaderboards = storage.leaderboards
+    for step in range(400):
+        key = f"c{rng.randrange(60)}"
+        if rng.random() < 0.05:
+            storage.remove("character", key)
+        else:
+            storage.increment("character", key, "count", rng.randint(1, 3))
+            storage.increment("character", key, "raids_won", rng.randint(0, 1))
+        if step % 50 == 0:
+            # Queried mid-way, so later changes update the index in place
+            leaderboards.index("character.count")
+
+    records = storage.character_stats
+    for metric, field in (("character.count", "count"), ("character.raids_won", "raids_won")):
+        expected = brute_top(records, field)
+        assert leaderboards.top(metric, len(expected) + 5) == expected
+        assert leaderboards.top(metric, 10, 20) == expected[20:30]
+        for key in records:
+            assert leaderboards.rank(metric, key) == brute_rank(records, field, key)
+        best = expected[0][1]
+        assert leaderboards.leaders(metric) == ([k for k, v in expected if v == best], best)
+    assert leaderboards.rank("character.count", "nobody") is None
+
+def test_reload_replaces_indexes(isolated_storage):
+    storage = isolated_storage
+    storage.update("character", "alex", count=5)
+    before = storage.leaderboards.index("character.count")
+    storage.character_stats["bob"] = type(storage.character_stats["alex"])(count=9)
+    storage.mark_dirty("character_stats")
+
+    after = storage.leaderboards.index("character.count")
+    assert after is not before
+    assert after.top(2) == [("bob", 9), ("alex", 5)]
+
+def test_ties_share_a_rank():
+    index = SortedIndex("count")
+    for key, count in (("a", 3), ("b", 5), ("c", 5), ("d", 1)):
+        index.update(key, type("Record", (), {"count": count})())
+    assert [index.rank(k) for k in "abcd"] == [3, 1, 1, 4]
+    assert index.leaders() == (["b", "c"], 5)
+    index.update("b", None)
+    assert index.leaders() == (["c"], 5) and len(index) == 3
@@ -0,0 +1,80 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from utils.media import MediaCache
+
+CDN_URL = "https://cdn.discordapp.com/attachments/1/2/{name}?ex={expiry:x}&is=0&hm=0"
+
+class FakeChannel:
+    """Stands in for ctx.send: records each call and answers like Discord, with a CDN URL per upload."""
+
+    def __init__(self, expiry: int):
+        self.expiry = expiry
+        self.calls = []
+
+    async def send(self, **kwargs):
+        self.calls.append(kwargs)
+        files = kwargs.get("files") or ([kwargs["file"]] if "file" in kwargs else [])
+        return SimpleNamespace(attachments=[
+            SimpleNamespace(url=CDN_URL.format(name=f.filename, expiry=self.expiry)) for f in files
+        ])
+
+def make_image(tmp_path, name="Alex.png", data=b"\x89PNG fake image"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return path
+
+def test_second_embed_send_reuses_cdn_url(tmp_path):
+    now = [1_700_000_000.0]
+    cache = MediaCache(clock=lambda: now[0])
+    channel = FakeChannel(expiry=int(now[0]) + 86400)
+    image = make_image(tmp_path)
+
+    asyncio.run(cache.send_embed(channel.send, discord.Embed(), image))
+    asyncio.run(cache.send_embed(channel.send, discord.Embed(), image))
+
+    first, second = channel.calls
+    assert "file" in first
+    assert first["embed"].image.url == "attachment://image.png"
+    assert "file" not in second
+    assert second["embed"].image.url == CDN_URL.format(name="image.png", expiry=channel.expiry)
+    assert (cache.uploads, cache.reuses) == (1, 1)
+
+def test_send_images_uploads_only_new_images(tmp_path):
+    cache = MediaCache(clock=lambda: 1_700_000_000.0)
+    channel = FakeChannel(expiry=1_700_086_400)
+    alex = make_image(tmp_path, "Alex.png", b"alex")
+    bob = make_image(tmp_path, "Bob.png", b"bob")
+
+    asyncio.run(cache.send_images(channel.send, [alex]))
+    asyncio.run(cache.send_images(channel.send, [alex, bob]))
+
+    second = channel.calls[1]
+    assert [f.filename for f in second["files"]] == ["Bob.png"]
+    assert [e.image.url for e in second["embeds"]] == [CDN_URL.format(name="Alex.png", expiry=channel.expiry)]
+
+def test_expired_url_is_uploaded_again(tmp_path):
+    now = [1_700_000_000.0]
+    cache = MediaCache(clock=lambda: now[0])
+    channel = FakeChannel(expiry=int(now[0]) + 3600)
+    image = make_image(tmp_path)
+
+    asyncio.run(cache.send_embed(channel.send, discord.Embed(), image))
+    now[0] += 3600
+    asyncio.run(cache.send_embed(channel.send, discord.Embed(), image))
+
+    assert all("file" in call for call in channel.calls)
+    assert cache.reuses == 0
+
+def test_replaced_image_is_uploaded_again(tmp_path):
+    cache = MediaCache(clock=lambda: 1_700_000_000.0)
+    channel = FakeChannel(expiry=1_700_086_400)
+    image = make_image(tmp_path, data=b"old")
+
+    asyncio.run(cache.send_embed(channel.send, discord.Embed(), image))
+    image.write_bytes(b"new contents")
+    asyncio.run(cache.send_embed(channel.send, discord.Embed(), image))
+
+    assert all("file" in call for call in channel.calls)
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pytest
+
+import utils.pool
+from data.indexes import IndexedSet
+from utils.assets import AssetDirectory
+from utils.pool import CharacterPool
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch, isolated_storage):
+    for name in ("Alex.png", "Bob.png", "Carl.png"):
+        (tmp_path / name).write_bytes(b"image")
+    characters = AssetDirectory(tmp_path)
+    monkeypatch.setattr(utils.pool, "catalog", SimpleNamespace(characters=characters))
+    monkeypatch.setattr(utils.pool, "storage", isolated_storage)
+    isolated_storage.update("character", "alex", count=1, group="duos")
+    isolated_storage.update("character", "bob", group="duos")
+
+    pool = CharacterPool()
+    isolated_storage.add_listener(pool)
+    characters.add_listener(pool)
+    return pool
+
+def test_pools_follow_counts_and_groups(pool, isolated_storage):
+    assert set(pool.pool()) == {"Alex.png"}
+    assert set(pool.pool(revealed_only=False)) == {"Alex.png", "Bob.png", "Carl.png"}
+    assert set(pool.pool(revealed_only=False, group="duos")) == {"Alex.png", "Bob.png"}
+    assert set(pool.pool(group="duos")) == {"Alex.png"}
+
+    isolated_storage.increment("character", "bob", "count")
+    isolated_storage.update("character", "alex", group="squads")
+    assert set(pool.pool()) == {"Alex.png", "Bob.png"}
+    assert set(pool.pool(group="duos")) == {"Bob.png"}
+    assert set(pool.pool(group="squads")) == {"Alex.png"}
+
+    isolated_storage.remove("character", "alex")
+    assert set(pool.pool()) == {"Bob.png"}
+    assert len(pool.pool(revealed_only=False, group="squads")) == 0
+
+def test_pools_follow_files(pool):
+    characters = utils.pool.catalog.characters
+    pool.pool()
+    characters.discard_file("Alex.png")
+    characters.add_file("Dana.png")
+    assert set(pool.pool()) == set()
+    assert set(pool.pool(revealed_only=False)) == {"Bob.png", "Carl.png", "Dana.png"}
+    assert len(pool.pool(revealed_only=False, group="duos")) == 1
+
+def test_pools_rebuild_on_load(pool, isolated_storage):
+    pool.pool()
+    isolated_storage.character_stats["carl"] = isolated_storage.character_stats["alex"]
+    isolated_storage.mark_dirty("character_stats")
+    assert set(pool.pool()) == {"Alex.png", "Carl.png"}
+
+def test_indexed_set():
+    items = IndexedSet()
+    for item in "abcd":
+        items.add(item)
+    items.add("a")
+    items.discard("b")
+    items.discard("z")
+    assert sorted(items) == ["a", "c", "d"] and len(items) == 3
+    assert items.choice() in items
+    assert sorted(items.sample(10)) == ["a", "c", "d"]
+    assert len(items.sample(10, replace=True)) == 10
+    with pytest.raises(IndexError):
+        IndexedSet().choice()
@@ -0,0 +1,41 @@
+import discord
+
+from utils.embeds import ResponseCache
+
+def test_rebuilds_only_when_the_version_changes():
+    cache = ResponseCache(max_entries=8)
+    builds = []
+
+    def build():
+        builds.append(1)
+        return discord.Embed(title=f"build {len(builds)}")
+
+    assert cache.get("stats", "alex", (1,), build).title == "build 1"
+    assert cache.get("stats", "alex", (1,), build).title == "build 1"
+    assert cache.get("stats", "alex", (2,), build).title == "build 2"
+    assert cache.get("stats", "bob", (2,), build).title == "build 3"
+    assert cache.stats() == {"entries": 2, "hits": 1, "misses": 3}
+
+def test_returns_copies():
+    cache = ResponseCache()
+    embed = cache.get("server", "guild", 1, lambda: (discord.Embed(title="a"), "text"))[0]
+    embed.set_thumbnail(url="attachment://image.png")
+    again = cache.get("server", "guild", 1, lambda: None)[0]
+    assert again.thumbnail.url is None
+
+def test_least_recently_used_is_dropped():
+    cache = ResponseCache(max_entries=2)
+    cache.get("stats", "a", 1, lambda: "a")
+    cache.get("stats", "b", 1, lambda: "b")
+    cache.get("stats", "a", 1, lambda: "stale")
+    cache.get("stats", "c", 1, lambda: "c")
+    assert [key for _, key in cache.entries] == ["a", "c"]
+
+def test_storage_versions_track_mutations(isolated_storage):
+    before = isolated_storage.version("user_stats", "character_stats")
+    isolated_storage.increment("user", "player", "total_rolls")
+    after = isolated_storage.version("user_stats", "character_stats")
+    assert after != before and after[1] == before[1]
+    with isolated_storage.transaction() as txn:
+        txn.increment("character", "alex", "count")
+    assert isolated_storage.version("user_stats", "character_stats")[1] != before[1]
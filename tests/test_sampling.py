@@ -0,0 +1,67 @@
+import random
+from collections import Counter
+
+import pytest
+
+import utils.sampling
+from utils.assets import AssetDirectory
+from utils.sampling import AliasTable, WeightedPool
+
+def implied_odds(table):
+    """Exact probability of each item under the table's prob/alias columns."""
+    n = len(table.items)
+    odds = Counter()
+    for i, item in enumerate(table.items):
+        odds[item] += table.prob[i] / n
+        odds[table.items[table.alias[i]]] += (1.0 - table.prob[i]) / n
+    return odds
+
+@pytest.mark.parametrize("weights", [
+    [1.0],
+    [1.0, 776.0],
+    [3.0, 1.0, 1.0, 5.0, 0.0, 2.5],
+    [random.Random(7).random() for _ in range(200)]
+])
+def test_alias_table_odds_match_weights(weights):
+    items = [f"item{i}" for i in range(len(weights))]
+    odds = implied_odds(AliasTable(items, weights))
+    total = sum(weights)
+    for item, weight in zip(items, weights):
+        assert odds[item] == pytest.approx(weight / total, abs=1e-12)
+
+def test_alias_table_draws_follow_weights():
+    random.seed(3)
+    table = AliasTable(["a", "b", "c"], [1.0, 2.0, 7.0])
+    counts = Counter(table.sample(100_000))
+    counts.update(table.draw() for _ in range(100_000))
+    for item, share in (("a", 0.1), ("b", 0.2), ("c", 0.7)):
+        assert counts[item] / 200_000 == pytest.approx(share, abs=0.01)
+
+@pytest.mark.parametrize("items, weights", [([], []), (["a"], [0.0]), (["a", "b"], [1.0])])
+def test_alias_table_rejects_bad_weights(items, weights):
+    with pytest.raises(ValueError):
+        AliasTable(items, weights)
+
+def test_weighted_pool_follows_folder_and_store(tmp_path, monkeypatch, isolated_storage):
+    monkeypatch.setattr(utils.sampling, "storage", isolated_storage)
+    for name in ("Sword.png", "Axe.png"):
+        (tmp_path / name).write_bytes(b"image")
+    directory = AssetDirectory(tmp_path)
+    pool = WeightedPool(
+        directory,
+        lambda filename: 1.0 if filename[:-4] in isolated_storage.tool_stats else 0.0,
+        store="tool_stats"
+    )
+
+    with pytest.raises(FileNotFoundError):
+        pool.draw()
+    isolated_storage.update("tool", "Sword")
+    assert set(pool.sample(50)) == {"Sword.png"}
+
+    isolated_storage.update("tool", "Axe")
+    directory.add_file("Bow.png")
+    isolated_storage.update("tool", "Bow")
+    assert set(pool.sample(500)) == {"Sword.png", "Axe.png", "Bow.png"}
+
+    directory.discard_file("Sword.png")
+    assert set(pool.sample(500)) == {"Axe.png", "Bow.png"}
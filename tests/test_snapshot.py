@@ -0,0 +1,80 @@
+import marshal
+import os
+
+import pytest
+
+import data.snapshot
+from data.backends import JournalBackend, SqliteBackend
+from data.models import CharacterStats
+from data.snapshot import read_boot_snapshot, write_boot_snapshot
+from data.storage import DataStorage
+
+@pytest.fixture
+def snapshot_file(tmp_path, monkeypatch):
+    path = tmp_path / "snapshot.bin"
+    monkeypatch.setattr(data.snapshot, "BOOT_SNAPSHOT_FILE", path)
+    return path
+
+@pytest.fixture(params=["json", "sqlite", "journal"])
+def make_backend(request, tmp_path, json_backend):
+    factories = {
+        "json": json_backend,
+        "sqlite": lambda: SqliteBackend(tmp_path / "stats.db"),
+        "journal": lambda: JournalBackend(tmp_path / "journal")
+    }
+    return factories[request.param]
+
+def open_storage(make_backend, tmp_path):
+    storage = DataStorage(backend=make_backend())
+    storage.activity.path = tmp_path / "activity.log"
+    storage.load_all()
+    return storage
+
+def test_storage_round_trip(make_backend, tmp_path, snapshot_file):
+    storage = open_storage(make_backend, tmp_path)
+    with storage.transaction() as txn:
+        txn.increment("character", "alex", "count", 3)
+        txn.update("character", "alex", group="alexcon")
+        txn.increment("user", "player", "total_rolls", 3)
+    storage.increment("server", "guild", "raid_wins")
+    storage.close()
+
+    for use_snapshot in (True, False):
+        if not use_snapshot:
+            # SQLite never writes one; the others must also load without it
+            snapshot_file.unlink(missing_ok=True)
+        reloaded = open_storage(make_backend, tmp_path)
+        assert reloaded.character_stats["alex"] == CharacterStats(count=3, group="alexcon")
+        assert reloaded.user_stats["player"].total_rolls == 3
+        assert reloaded.server_stats["guild"].raid_wins == 1
+        reloaded.writer.close()
+        reloaded.backend.close()
+
+def test_snapshot_round_trip(snapshot_file):
+    stores = {store: {} for store in data.snapshot.STORE_MODELS}
+    stores["character_stats"]["alex"] = CharacterStats(count=3)
+    write_boot_snapshot(stores, "JsonBackend")
+
+    assert read_boot_snapshot("JsonBackend", 0) == stores
+    assert read_boot_snapshot("JournalBackend", 0) is None
+    # Older than the backend's files, or the backend has none
+    assert read_boot_snapshot("JsonBackend", os.stat(snapshot_file).st_mtime_ns + 1) is None
+    assert read_boot_snapshot("JsonBackend", None) is None
+
+@pytest.mark.parametrize("payload", [
+    marshal.dumps([1, 2, 3]),
+    marshal.dumps("not a snapshot"),
+    marshal.dumps({"version": data.snapshot.FORMAT_VERSION}),
+    b"\x00garbage",
+    b""
+])
+def test_corrupt_snapshot_is_ignored(snapshot_file, payload):
+    snapshot_file.write_bytes(payload)
+    assert read_boot_snapshot("JsonBackend", 0) is None
+
+def test_snapshot_with_broken_stores_is_ignored(snapshot_file):
+    write_boot_snapshot({store: {} for store in data.snapshot.STORE_MODELS}, "JsonBackend")
+    snapshot = marshal.loads(snapshot_file.read_bytes())
+    snapshot["stores"]["character_stats"] = {"alex": (1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12)}
+    snapshot_file.write_bytes(marshal.dumps(snapshot))
+    assert read_boot_snapshot("JsonBackend", 0) is None
@@ -0,0 +1,40 @@
+import pytest
+
+import game.stats
+from game.stats import StatsManager
+
+@pytest.fixture
+def stats(isolated_storage, monkeypatch):
+    monkeypatch.setattr(game.stats, "storage", isolated_storage)
+    return isolated_storage
+
+def test_increment_character_count_status_codes(stats):
+    assert StatsManager.increment_character_count("alex") == 1  # first roll of all takes the lead
+    assert StatsManager.increment_character_count("bob") == 2  # tied at 1
+    assert StatsManager.increment_character_count("bob") == 1  # 2 beats 1
+    assert StatsManager.increment_character_count("alex") == 2  # tied at 2
+
+    stats.update("character", "carl", count=10)
+    assert StatsManager.increment_character_count("alex") == 0  # 3 is behind 10
+
+    stats.update("character", "carl", count=99)
+    stats.update("character", "dana", count=99)
+    assert StatsManager.increment_character_count("carl") == 100  # first to 100
+    assert StatsManager.increment_character_count("dana") == 2  # second to 100 only ties
+    assert StatsManager.increment_character_count("dana") == 1
+    assert stats.character_stats["dana"].count == 101
+
+def test_most_common_character(stats):
+    stats.update("character", "alex", count=5)
+    stats.update("character", "bob", count=3)
+    assert StatsManager.get_most_common_character() == ("alex", 5)
+    StatsManager.increment_character_count("bob")
+    StatsManager.increment_character_count("bob")
+    assert StatsManager.get_most_common_character() == (["alex", "bob"], 5)
+
+def test_leader_follows_reload(stats):
+    stats.update("character", "alex", count=5)
+    StatsManager.get_most_common_character()
+    stats.character_stats["alex"].count = 1
+    stats.mark_dirty("character_stats")
+    assert StatsManager.increment_character_count("bob") == 2
@@ -0,0 +1,66 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import game.pvp
+import game.stats
+from data.models import CharacterStats
+from game.pvp import PVPManager
+from game.stats import StatsManager
+
+def test_commit_applies_every_change(isolated_storage):
+    with isolated_storage.transaction() as txn:
+        assert txn.increment("user", "player", "total_damage", 10) == 10
+        assert txn.max_update("user", "player", "highest_damage", 7) == 7
+        assert txn.max_update("user", "player", "highest_damage", 3) == 7
+        txn.update("character", "alex", group="alexcon")
+        # Staged, not applied
+        assert "player" not in isolated_storage.user_stats
+
+    player = isolated_storage.user_stats["player"]
+    assert (player.total_damage, player.highest_damage) == (10, 7)
+    assert isolated_storage.character_stats["alex"] == CharacterStats(group="alexcon")
+    assert isolated_storage.group_totals.get("alexcon")["members"] == 1
+
+def test_exception_applies_nothing(isolated_storage):
+    isolated_storage.increment("user", "player", "total_rolls")
+    version = isolated_storage.version("user_stats")
+    with pytest.raises(RuntimeError):
+        with isolated_storage.transaction() as txn:
+            txn.increment("user", "player", "total_rolls", 5)
+            txn.update("user", "player", cursed=True)
+            raise RuntimeError("send failed")
+
+    assert isolated_storage.user_stats["player"].total_rolls == 1
+    assert not isolated_storage.user_stats["player"].cursed
+    assert isolated_storage.version("user_stats") == version
+
+def test_pvp_stats_survive_failed_announcements(isolated_storage, monkeypatch):
+    for module in (game.pvp, game.stats):
+        monkeypatch.setattr(module, "storage", isolated_storage)
+    monkeypatch.setattr(game.pvp, "roll_character", iter(["Alex.png", "Bob.png"]).__next__)
+    monkeypatch.setattr(game.pvp, "roll_tool", lambda: "Sword.png")
+    monkeypatch.setattr(game.pvp, "calculate_damage_multiplier", lambda character, tool: 2.0 if character == "alex" else 1.0)
+
+    async def send(*args, **kwargs):
+        raise OSError("Discord is down")
+
+    # No guild, as in a DM or thread the bot can't see the guild of
+    channel = SimpleNamespace(send=send, guild=None)
+    manager = PVPManager("host", channel, bot=None)
+    manager.challenger_name = "challenger"
+    with pytest.raises(OSError):
+        asyncio.run(manager._conduct_pvp_battle())
+
+    assert isolated_storage.character_stats["alex"].pvp_wins == 2
+    assert isolated_storage.character_stats["bob"].total_pvp == 2
+    assert isolated_storage.user_stats["host"].pvp_wins == 1
+    assert isolated_storage.user_stats["challenger"].total_pvp == 1
+
+def test_increment_character_count_in_transaction(isolated_storage, monkeypatch):
+    monkeypatch.setattr(game.stats, "storage", isolated_storage)
+    with isolated_storage.transaction() as txn:
+        assert StatsManager.increment_character_count("alex", txn) == 1
+        assert "alex" not in isolated_storage.character_stats
+    assert isolated_storage.character_stats["alex"].count == 1
@@ -0,0 +1,200 @@
+import hashlib
+import os
+import random
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from config.config import (
+    IMAGES_DIR,
+    TOOLS_DIR,
+    BOSSES_DIR,
+    EX_DIR,
+    EVOLUTIONS_DIR,
+    ALLOWED_IMAGE_EXTENSIONS,
+    ASSET_RESCAN_INTERVAL
+)
+
+# path -> (mtime_ns, size, sha256), so unchanged files are hashed once
+_digests: Dict[str, Tuple[int, int, str]] = {}
+
+def content_hash(path: Union[str, Path]) -> str:
+    """Get the SHA-256 of a file, re-reading it only when its size or mtime changes."""
+    key = str(path)
+    stat = os.stat(key)
+    cached = _digests.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(key, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    _digests[key] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+    return digest.hexdigest()
+
+def forget_hash(path: Union[str, Path]) -> Optional[str]:
+    """Drop a file's remembered hash, e.g. once the file is deleted. Returns the hash, if there was one."""
+    cached = _digests.pop(str(path), None)
+    return cached[2] if cached is not None else None
+
+@lru_cache(maxsize=4096)
+def display_name(filename: str) -> str:
+    """Get an asset's name as shown to players: the filename without its image extension."""
+    stem, ext = os.path.splitext(filename)
+    return stem if ext.casefold() in ALLOWED_IMAGE_EXTENSIONS else filename
+
+@lru_cache(maxsize=4096)
+def canonical_name(filename: str) -> str:
+    """Get the lookup name for an asset file or name: its display name, casefolded."""
+    return display_name(filename).casefold()
+
+class AssetDirectory:
+    """
+    The image files of one asset folder, held in memory.
+
+    Files are kept in a list (for O(1) random picks) plus a name index.
+    The folder's mtime is checked at most every ASSET_RESCAN_INTERVAL
+    seconds, and only a changed folder is listed again.
+    """
+
+    def __init__(self, path: Path, extensions: Tuple[str, ...] = ALLOWED_IMAGE_EXTENSIONS):
+        self.path = Path(path)
+        self.extensions = extensions
+        self.files: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.by_name: Dict[str, str] = {}
+        self._paths: Dict[str, Path] = {}
+        self._mtime: Optional[int] = None
+        self._listed = False
+        self._checked_at: Optional[float] = None
+        self._listeners: List[Any] = []
+
+    def add_listener(self, listener: Any) -> None:
+        """Call listener.on_add(filename) / listener.on_discard(filename) as files come and go."""
+        self._listeners.append(listener)
+
+    def ensure_fresh(self) -> None:
+        """Re-list the folder if it changed and the rescan interval has passed."""
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= ASSET_RESCAN_INTERVAL:
+            self._checked_at = now
+            self.refresh()
+
+    def refresh(self) -> bool:
+        """Re-list the folder if its mtime changed. Returns True if it was re-listed."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._listed and mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        self._listed = True
+
+        current = set()
+        if mtime is not None:
+            with os.scandir(self.path) as entries:
+                current = {
+                    entry.name for entry in entries
+                    if entry.name.endswith(self.extensions) and entry.is_file()
+                }
+        for filename in [f for f in self.files if f not in current]:
+            self.discard_file(filename)
+        for filename in current:
+            self.add_file(filename)
+        return True
+
+    def invalidate(self) -> None:
+        """Force a full re-list on the next access."""
+        self._paths.clear()
+        self._listed = False
+        self._checked_at = None
+
+    def add_file(self, filename: str) -> None:
+        """Record a file that was just saved into the folder."""
+        if filename in self.positions or not filename.endswith(self.extensions):
+            return
+        self.positions[filename] = len(self.files)
+        self.files.append(filename)
+        self.by_name[canonical_name(filename)] = filename
+        self._paths.pop(canonical_name(filename), None)
+        for listener in self._listeners:
+            listener.on_add(filename)
+
+    def discard_file(self, filename: str) -> None:
+        """Forget a file that was removed from the folder."""
+        position = self.positions.pop(filename, None)
+        if position is None:
+            return
+        last = self.files.pop()
+        if last != filename:
+            self.files[position] = last
+            self.positions[last] = position
+        name = canonical_name(filename)
+        if self.by_name.get(name) == filename:
+            del self.by_name[name]
+            self._paths.pop(name, None)
+        for listener in self._listeners:
+            listener.on_discard(filename)
+
+    def choice(self) -> str:
+        """Get a random filename from the folder."""
+        self.ensure_fresh()
+        if not self.files:
+            raise FileNotFoundError(f"No valid files found in {self.path}")
+        return random.choice(self.files)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Get the filename for an asset name (any case, with or without extension)."""
+        self.ensure_fresh()
+        return self.by_name.get(canonical_name(name))
+
+    def path_for(self, name: str) -> Optional[Path]:
+        """Get the full path of an asset by name, or None if there is no such file."""
+        self.ensure_fresh()
+        key = canonical_name(name)
+        path = self._paths.get(key)
+        if path is None:
+            filename = self.by_name.get(key)
+            if filename is None:
+                return None
+            path = self._paths[key] = self.path / filename
+        return path
+
+    def __contains__(self, name: str) -> bool:
+        return self.resolve(name) is not None
+
+    def __len__(self) -> int:
+        self.ensure_fresh()
+        return len(self.files)
+
+    def __iter__(self) -> Iterator[str]:
+        self.ensure_fresh()
+        return iter(list(self.files))
+
+class AssetCatalog:
+    """In-memory index of every asset folder the bot draws from."""
+
+    def __init__(self):
+        self.characters = AssetDirectory(IMAGES_DIR)
+        self.items = AssetDirectory(TOOLS_DIR)
+        self.bosses = AssetDirectory(BOSSES_DIR)
+        self.ex = AssetDirectory(EX_DIR, (".gif",))
+        self.evolutions = AssetDirectory(EVOLUTIONS_DIR, (".gif",))
+
+    def directories(self) -> Tuple[AssetDirectory, ...]:
+        return (self.characters, self.items, self.bosses, self.ex, self.evolutions)
+
+    def refresh(self) -> None:
+        """Re-list every folder whose mtime changed."""
+        for directory in self.directories():
+            directory.refresh()
+
+    def invalidate(self) -> None:
+        """Force every folder to be re-listed on its next access."""
+        for directory in self.directories():
+            directory.invalidate()
+
+# Global catalog instance
+catalog = AssetCatalog()
@@ -1,9 +1,10 @@
-from typing import List, Optional, Union
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
 import discord
 from pathlib import Path
 
 from config.messages import *
-from config.config import ASSETS_DIR
+from config.config import ASSETS_DIR, RESPONSE_CACHE_SIZE
 from data.models import CharacterStats, UserStats, ServerStats
 
 def create_raid_join_embed(host: str, boss_message: str) -> discord.Embed:
@@ -98,6 +99,45 @@ def create_top_ten_embed(standings: dict) -> discord.Embed:
 
     return embed
 
+def create_leaderboard_embed(
+    metric: str,
+    rows: List[tuple],
+    offset: int,
+    page: int,
+    pages: int,
+    rank_line: Optional[str] = None
+) -> discord.Embed:
+    """Create one page of a leaderboard embed."""
+    embed = discord.Embed(title=EMBED_LEADERBOARD.format(metric=metric), color=discord.Color.gold())
+
+    for position, (name, value) in enumerate(rows, start=offset + 1):
+        if isinstance(value, float):
+            value = round(value, 2)
+        embed.add_field(name=f"#{position} {name}"[:256], value=value, inline=False)
+
+    footer = LEADERBOARD_PAGE.format(page=page, pages=pages)
+    if rank_line:
+        footer = f"{rank_line} | {footer}"
+    embed.set_footer(text=footer)
+    return embed
+
+def create_groups_embed(totals: dict) -> discord.Embed:
+    """Create an embed listing every group's totals, in the given order."""
+    lines = [GROUP_TOTALS.format(group=group, **group_totals) for group, group_totals in totals.items()]
+    return discord.Embed(title=EMBED_GROUPS, description="\n".join(lines)[:4096], color=discord.Color.blue())
+
+def create_trending_embed(kind: str, window: str, entries: List[Tuple[str, int]], footer: Optional[str] = None) -> discord.Embed:
+    """Create an embed listing the characters with the most recent activity."""
+    lines = [f"{i}. " + TRENDING_ENTRY.format(name=name, count=count) for i, (name, count) in enumerate(entries, 1)]
+    embed = discord.Embed(
+        title=EMBED_TRENDING.format(kind=kind, window=window),
+        description="\n".join(lines) or TRENDING_EMPTY,
+        color=discord.Color.orange()
+    )
+    if footer:
+        embed.set_footer(text=footer)
+    return embed
+
 def create_raid_master_embed(
     name: str,
     wins: int,
@@ -183,4 +223,54 @@ def create_pvp_battle_embed(
         inline=False
     )
     
-    return embed 
\ No newline at end of file
+    return embed 
+
+class ResponseCache:
+    """
+    LRU of built command responses (embeds, or tuples holding embeds).
+
+    Entries are keyed by (command, args) and tagged with the data version
+    they were built from, e.g. storage.version("user_stats"); a lookup
+    with a different version rebuilds the entry. Embeds are copied on the
+    way out, since sending may set attachment URLs on them.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, Hashable], Tuple[Hashable, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, command: str, args: Hashable, version: Hashable, build: Callable[[], Any]) -> Any:
+        """Get a response built from the given data version, building it if needed."""
+        key = (command, args)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return _copy_response(entry[1])
+
+        self.misses += 1
+        response = build()
+        self.entries[key] = (version, response)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return _copy_response(response)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters, for logging."""
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+def _copy_response(response: Any) -> Any:
+    if isinstance(response, discord.Embed):
+        return response.copy()
+    if isinstance(response, tuple):
+        return tuple(_copy_response(part) for part in response)
+    return response
+
+# Global response cache instance
+response_cache = ResponseCache()
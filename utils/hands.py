@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Sequence, Tuple, Union
+
+from config.config import (
+    HANDS_DIR,
+    HAND_CACHE_ENTRIES,
+    HAND_CARD_HEIGHT,
+    HAND_COLUMNS,
+    HAND_RENDER_WORKERS,
+    JPEG_QUALITY
+)
+from utils.assets import content_hash, forget_hash
+from utils.media import image_bytes, media
+from utils.variants import Image, variants
+
+BACKGROUND = (49, 51, 56)  # Discord's dark theme, so the gaps between cards blend in
+GAP = 8
+
+class HandRenderer:
+    """
+    Draws a raid hand (character, tool and any extra cards) as one image.
+
+    Images are cached under HANDS_DIR by the content hashes of their
+    cards, so a repeated hand is rendered once. Hands with random extra
+    cards rarely repeat, so only max_entries files are kept: evicting a
+    hand deletes its file, along with what the hash, variant, byte and
+    URL caches remember about it. Files left by earlier runs count
+    towards the limit and are deleted first (oldest first), unless a
+    render reuses them. Rendering
+    runs on a small thread pool. Without Pillow, render() returns None
+    and callers send the cards separately.
+    """
+
+    def __init__(self, root: Path = HANDS_DIR, workers: int = HAND_RENDER_WORKERS, max_entries: int = HAND_CACHE_ENTRIES):
+        self.root = Path(root)
+        self.workers = workers
+        self.max_entries = max_entries
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._rendered: "OrderedDict[Tuple[str, ...], Path]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Files from earlier runs not yet reused, oldest first (None until scanned)
+        self._leftovers: "Optional[OrderedDict[Path, None]]" = None
+
+    def render(self, paths: Sequence[Union[str, Path]]) -> Optional[Path]:
+        """Get the path of a hand's composite image, drawing it if needed."""
+        if Image is None or not paths:
+            return None
+        key = tuple(content_hash(path) for path in paths)
+        with self._lock:
+            if self._leftovers is None:
+                self._scan_leftovers()
+            cached = self._rendered.get(key)
+            if cached is not None:
+                self._rendered.move_to_end(key)
+                return cached
+
+        name = hashlib.sha256("|".join(key).encode()).hexdigest()
+        target = self.root / f"{name}.jpg"
+        if not target.exists():
+            self._draw([variants.select(path) for path in paths], target)
+        with self._lock:
+            self._leftovers.pop(target, None)
+            self._rendered[key] = target
+            self._rendered.move_to_end(key)
+            self._evict()
+        return target
+
+    def _evict(self) -> None:
+        """Delete hand images until at most max_entries remain."""
+        while len(self._rendered) + len(self._leftovers) > self.max_entries:
+            if self._leftovers:
+                evicted, _ = self._leftovers.popitem(last=False)
+            else:
+                _, evicted = self._rendered.popitem(last=False)
+            evicted.unlink(missing_ok=True)
+            self._forget(evicted)
+
+    @staticmethod
+    def _forget(path: Path) -> None:
+        """Drop a deleted hand image from the caches that key on its path or content."""
+        image_bytes.discard(path)
+        digest = forget_hash(path)
+        if digest is not None:
+            variants.forget(digest)
+            media.forget_digest(digest)
+
+    def _scan_leftovers(self) -> None:
+        """Adopt the hand images earlier runs left on disk, oldest first."""
+        self._leftovers = OrderedDict()
+        try:
+            files = sorted(self.root.glob("*.jpg"), key=lambda path: path.stat().st_mtime_ns)
+        except OSError:
+            return
+        self._leftovers.update(dict.fromkeys(files))
+        self._evict()
+
+    def _draw(self, paths: Sequence[Path], target: Path) -> None:
+        cards = []
+        for path in paths:
+            with Image.open(path) as image:
+                image.seek(0)
+                card = image.convert("RGBA")
+            width = max(1, round(card.width * HAND_CARD_HEIGHT / card.height))
+            cards.append(card.resize((width, HAND_CARD_HEIGHT)))
+
+        rows = [cards[i:i + HAND_COLUMNS] for i in range(0, len(cards), HAND_COLUMNS)]
+        width = max(sum(card.width for card in row) + GAP * (len(row) - 1) for row in rows)
+        height = HAND_CARD_HEIGHT * len(rows) + GAP * (len(rows) - 1)
+        sheet = Image.new("RGB", (width, height), BACKGROUND)
+        y = 0
+        for row in rows:
+            x = 0
+            for card in row:
+                sheet.paste(card, (x, y), card)
+                x += card.width + GAP
+            y += HAND_CARD_HEIGHT + GAP
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        sheet.save(tmp, "JPEG", quality=JPEG_QUALITY, optimize=True)
+        os.replace(tmp, target)
+
+    async def render_async(self, paths: Sequence[Union[str, Path]]) -> Optional[Path]:
+        """render() on the worker pool. Returns None if Pillow is missing or drawing failed."""
+        if Image is None:
+            return None
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hand-renderer")
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, self.render, list(paths))
+        except Exception as e:
+            print(f"Failed to render hand: {e}")
+            return None
+
+# Global hand renderer instance
+hand_renderer = HandRenderer()
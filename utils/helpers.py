@@ -1,24 +1,16 @@
-import os
-import random
-from pathlib import Path
+from collections import OrderedDict
 from typing import List, Optional, Tuple
 from fuzzywuzzy import fuzz
 
 from config.config import (
-    IMAGES_DIR,
-    TOOLS_DIR,
-    BOSSES_DIR,
-    ALLOWED_IMAGE_EXTENSIONS
+    ALLOWED_IMAGE_EXTENSIONS,
+    NEGATIVE_LOOKUP_CACHE_SIZE
 )
+from data.damage import damage_multiplier
+from data.models import ToolStats
 from data.storage import storage
-
-def get_random_file(directory: Path, allowed_extensions: Tuple[str, ...] = ALLOWED_IMAGE_EXTENSIONS) -> str:
-    """Get a random file from a directory with allowed extensions."""
-    all_files = os.listdir(directory)
-    valid_files = [file for file in all_files if file.endswith(allowed_extensions)]
-    if not valid_files:
-        raise FileNotFoundError(f"No valid files found in {directory}")
-    return random.choice(valid_files)
+from utils import sampling
+from utils.pool import character_pool
 
 def get_image_extension(filename: str) -> str:
     """Get the file extension from a filename."""
@@ -40,22 +32,42 @@ def find_closest_match(query: str, choices: List[str], threshold: int = 92) -> O
             
     return closest_match if closest_score >= threshold else None
 
-def roll_character(revealed_only: bool = True) -> str:
-    """Roll a random character."""
-    while True:
-        character = get_random_file(IMAGES_DIR)
-        name = os.path.splitext(character)[0].casefold()
-        if storage.get_character_stats(name) is not None:
-            if not revealed_only or storage.get_character_stats(name).count > 0:
-                return character
+# Queries that matched no character, valid while the number of characters is unchanged
+_unmatched_characters: "OrderedDict[str, None]" = OrderedDict()
+_unmatched_character_count = 0
+
+def find_character(query: str) -> Optional[str]:
+    """Find the stats key for a character name, allowing small typos."""
+    global _unmatched_character_count
+    key = query.casefold()
+    if storage.peek_character_stats(key) is not None:
+        return key
+    
+    if _unmatched_character_count != len(storage.character_stats):
+        _unmatched_characters.clear()
+        _unmatched_character_count = len(storage.character_stats)
+    if key in _unmatched_characters:
+        _unmatched_characters.move_to_end(key)
+        return None
+        
+    match = find_closest_match(key, storage.character_stats.keys())
+    if match is None:
+        _unmatched_characters[key] = None
+        if len(_unmatched_characters) > NEGATIVE_LOOKUP_CACHE_SIZE:
+            _unmatched_characters.popitem(last=False)
+    return match
+
+def roll_character(revealed_only: bool = True, group: Optional[str] = None) -> str:
+    """Roll a random character, optionally from one group only."""
+    return character_pool.pool(revealed_only, group).choice()
+
+def roll_characters(n: int, revealed_only: bool = True, replace: bool = True, group: Optional[str] = None) -> List[str]:
+    """Roll n random characters at once."""
+    return character_pool.pool(revealed_only, group).sample(n, replace)
 
 def roll_tool() -> str:
     """Roll a random tool."""
-    while True:
-        tool = get_random_file(TOOLS_DIR)
-        name = os.path.splitext(tool)[0]
-        if name in storage.tool_stats:
-            return tool
+    return sampling.tools.draw()
 
 def roll_boss(mode: str, server_name: str) -> str:
     """Roll a boss based on mode and server."""
@@ -71,35 +83,22 @@ def roll_boss(mode: str, server_name: str) -> str:
             storage.update_server_stats(server_name, campaign=boss)
         return f"{boss}.jpg"
     
-    while True:
-        print("Attempting to get boss...")
-        boss = get_random_file(BOSSES_DIR)
-        print(boss)
-        name = os.path.splitext(boss)[0]
-        print(name)
-        if storage.get_boss_stats(name).times_defeated >= 0:
-            print("Classic boss selected")
-            return boss
+    boss = sampling.bosses.draw()
+    print(f"Classic boss selected: {boss}")
+    return boss
 
-def calculate_damage_multiplier(character: str, tool: str) -> float:
+def calculate_damage_multiplier(character: str, tool: Optional[str]) -> float:
     """Calculate damage multiplier for a character-tool combination."""
-    char_stats = storage.get_character_stats(character)
-    tool_stats = storage.get_tool_stats(tool)
-    
-    base_multiplier = char_stats.count * 10
-    
-    # Apply tool multiplier
-    if tool_stats is not None:
-        if character in tool_stats.character_multipliers:
-            base_multiplier *= tool_stats.character_multipliers[character]
-        else:
-            base_multiplier *= tool_stats.default_multiplier
-        
-    # Apply group bonus
-        if tool_stats.group == char_stats.group:
-            base_multiplier *= 2
-        
-    return base_multiplier
+    if storage.damage is not None:
+        return storage.damage.lookup(character, tool)
+    tool_stats = storage.peek_tool_stats(tool) if tool is not None else None
+    return damage_multiplier(character, storage.get_character_stats(character), tool_stats or ToolStats())
+
+def calculate_hand_damage(pairs: List[Tuple[str, Optional[str]]]) -> List[float]:
+    """Calculate damage multipliers for many character-tool combinations at once."""
+    if storage.damage is not None:
+        return storage.damage.lookup_many(pairs)
+    return [calculate_damage_multiplier(character, tool) for character, tool in pairs]
 
 def is_valid_image_path(path: str) -> bool:
     """Check if a path is safe and valid for image operations."""
@@ -0,0 +1,217 @@
+import io
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+import discord
+
+from config.config import MEDIA_URL_TTL, MEDIA_URL_REFRESH_MARGIN, IMAGE_CACHE_BYTES
+from utils.assets import content_hash
+from utils.variants import VARIANT_SIZES, variants
+
+MAX_EMBEDS_PER_MESSAGE = 10
+
+# Anything with an async send(content=..., embed(s)=..., file(s)=...) returning a
+# message: ctx.send, ctx.reply, channel.send, or a fake in a test.
+Sender = Callable[..., Awaitable[Any]]
+
+def url_expiry(url: str, now: Optional[float] = None) -> float:
+    """Get when a Discord CDN URL stops working, from its signed ex= parameter."""
+    now = time.time() if now is None else now
+    expiry = parse_qs(urlparse(url).query).get("ex")
+    if expiry:
+        try:
+            return float(int(expiry[0], 16))
+        except ValueError:
+            pass
+    return now + MEDIA_URL_TTL
+
+class ImageBytesCache:
+    """
+    LRU of image file contents, bounded by their total size in bytes.
+
+    Entries are checked on every hit, so replaced files are re-read:
+    against a caller-supplied tag (the content hash it already computed)
+    if there is one, else against the file's mtime and size. Files
+    larger than the whole budget are read but not kept.
+    """
+
+    def __init__(self, budget: int = IMAGE_CACHE_BYTES):
+        self.budget = budget
+        self.entries: "OrderedDict[str, Tuple[Any, bytes]]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: Union[str, Path], tag: Optional[str] = None) -> bytes:
+        """Get a file's contents, from memory if they are cached."""
+        key = str(path)
+        if tag is None:
+            stat = os.stat(key)
+            tag = (stat.st_mtime_ns, stat.st_size)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == tag:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        if entry is not None:
+            self._drop(key)
+        with open(key, "rb") as f:
+            data = f.read()
+        if len(data) <= self.budget:
+            self.entries[key] = (tag, data)
+            self.size += len(data)
+            while self.size > self.budget:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+        return data
+
+    def _drop(self, key: str) -> None:
+        self.size -= len(self.entries.pop(key)[1])
+
+    def discard(self, path: Union[str, Path]) -> None:
+        """Drop a file's cached contents, e.g. once the file is deleted."""
+        if str(path) in self.entries:
+            self._drop(str(path))
+
+    def file(self, path: Union[str, Path], filename: Optional[str] = None, tag: Optional[str] = None) -> discord.File:
+        """Get a discord.File reading from the cached bytes instead of the disk."""
+        # BytesIO shares the bytes object's buffer until written to, so this doesn't copy
+        return discord.File(io.BytesIO(self.get(path, tag)), filename=filename or Path(path).name)
+
+    def warm(self, resolved: Iterable[Tuple[Path, str]]) -> None:
+        """Load files into the cache ahead of their first send, given (path, tag) pairs from VariantCache.resolve."""
+        for path, tag in resolved:
+            try:
+                self.get(path, tag)
+            except OSError as e:
+                print(f"Could not preload {path}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+class MediaCache:
+    """
+    CDN URLs of images the bot has already uploaded, keyed by the content
+    hash of the source image and the variant kind sent.
+
+    The first send of an image uploads it as a file; later sends of the
+    same bytes put the recorded URL in an embed instead. URLs are dropped
+    shortly before their signed expiry, so the next send uploads again.
+    Each send resolves a path (one stat, see VariantCache.resolve) and
+    reuses that hash for the URL lookup and the byte cache.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self.urls: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self.uploads = 0
+        self.reuses = 0
+
+    def _lookup(self, key: Tuple[str, str]) -> Optional[str]:
+        entry = self.urls.get(key)
+        if entry is None:
+            return None
+        url, expires = entry
+        if self.clock() >= expires - MEDIA_URL_REFRESH_MARGIN:
+            del self.urls[key]
+            return None
+        return url
+
+    def url_for(self, path: Union[str, Path], kind: str = "full") -> Optional[str]:
+        """Get a still-valid CDN URL for an image, if it was uploaded before."""
+        return self._lookup((content_hash(path), kind))
+
+    def record(self, path: Union[str, Path], url: str, kind: str = "full") -> None:
+        """Remember the CDN URL an image was uploaded to."""
+        self.urls[(content_hash(path), kind)] = (url, url_expiry(url, self.clock()))
+
+    def forget(self, path: Union[str, Path], kind: str = "full") -> None:
+        """Drop the URL for an image, e.g. after it was replaced or a link broke."""
+        self.urls.pop((content_hash(path), kind), None)
+
+    def forget_digest(self, digest: str) -> None:
+        """Drop the URLs of every variant kind of an image's content, e.g. once the file is deleted."""
+        for kind in VARIANT_SIZES:
+            self.urls.pop((digest, kind), None)
+
+    def _record_attachments(self, keys: Sequence[Tuple[str, str]], message: Any) -> None:
+        attachments = getattr(message, "attachments", None) or []
+        for key, attachment in zip(keys, attachments):
+            self.urls[key] = (attachment.url, url_expiry(attachment.url, self.clock()))
+        self.uploads += len(keys)
+
+    async def send_images(self, send: Sender, paths: Sequence[Union[str, Path]], content: Optional[str] = None, **kwargs: Any) -> Any:
+        """Send images, as embeds of their CDN URLs where possible and as uploads otherwise."""
+        embeds: List[discord.Embed] = []
+        files: List[discord.File] = []
+        keys: List[Tuple[str, str]] = []
+        for path in map(Path, paths):
+            send_path, digest = variants.resolve(path, "full")
+            key = (digest, "full")
+            url = self._lookup(key) if len(embeds) < MAX_EMBEDS_PER_MESSAGE else None
+            if url is None:
+                files.append(image_bytes.file(send_path, path.stem + send_path.suffix, digest))
+                keys.append(key)
+            else:
+                embeds.append(discord.Embed().set_image(url=url))
+
+        if content is not None:
+            kwargs["content"] = content
+        if embeds:
+            kwargs["embeds"] = embeds
+        if files:
+            kwargs["files"] = files
+        message = await send(**kwargs)
+        self.reuses += len(embeds)
+        self._record_attachments(keys, message)
+        return message
+
+    async def send_embed(
+        self,
+        send: Sender,
+        embed: discord.Embed,
+        path: Union[str, Path],
+        filename: str = "image.png",
+        thumbnail: bool = False,
+        content: Optional[str] = None,
+        **kwargs: Any
+    ) -> Any:
+        """Send an embed showing an image, uploading the image only if it has no CDN URL yet."""
+        kind = "thumb" if thumbnail else "full"
+        path, digest = variants.resolve(path, kind)
+        key = (digest, kind)
+        filename = Path(filename).stem + path.suffix
+        url = self._lookup(key)
+        kwargs["embed"] = embed
+        if content is not None:
+            kwargs["content"] = content
+        if url is None:
+            url = f"attachment://{filename}"
+            kwargs["file"] = image_bytes.file(path, filename, digest)
+        else:
+            self.reuses += 1
+        if thumbnail:
+            embed.set_thumbnail(url=url)
+        else:
+            embed.set_image(url=url)
+        message = await send(**kwargs)
+        if "file" in kwargs:
+            self._record_attachments([key], message)
+        return message
+
+# Global instances
+image_bytes = ImageBytesCache()
+media = MediaCache()
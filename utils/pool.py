@@ -0,0 +1,97 @@
+from typing import Dict, Optional
+
+from data.indexes import IndexedSet
+from data.models import CharacterStats
+from data.storage import storage
+from utils.assets import catalog, canonical_name
+
+class CharacterPool:
+    """
+    Character image files grouped by whether they can be rolled, and by group.
+
+    Listens to both the storage (counts and groups) and the character
+    folder of the asset catalog (files), so every pool is always current
+    and drawing from one is a single random pick.
+    """
+
+    def __init__(self):
+        self.all: IndexedSet[str] = IndexedSet()
+        self.revealed: IndexedSet[str] = IndexedSet()
+        self.groups: Dict[str, IndexedSet[str]] = {}
+        self.revealed_groups: Dict[str, IndexedSet[str]] = {}
+        self._group_of: Dict[str, str] = {}
+        self._built = False
+
+    def _ensure_built(self) -> None:
+        if not self._built:
+            self.on_load(storage)
+
+    @staticmethod
+    def _discard(pools: Dict[str, IndexedSet[str]], group: str, filename: str) -> None:
+        members = pools.get(group)
+        if members is not None:
+            members.discard(filename)
+            if not members:
+                del pools[group]
+
+    def _place(self, filename: str, record: Optional[CharacterStats]) -> None:
+        """Put a file into the pools its stats call for."""
+        old_group = self._group_of.pop(filename, None)
+        if old_group is not None:
+            self._discard(self.groups, old_group, filename)
+            self._discard(self.revealed_groups, old_group, filename)
+
+        revealed = record is not None and record.count > 0
+        if revealed:
+            self.revealed.add(filename)
+        else:
+            self.revealed.discard(filename)
+        if record is not None:
+            self._group_of[filename] = record.group
+            self.groups.setdefault(record.group, IndexedSet()).add(filename)
+            if revealed:
+                self.revealed_groups.setdefault(record.group, IndexedSet()).add(filename)
+
+    def on_load(self, storage) -> None:
+        """Rebuild every pool from the catalog and the stores."""
+        self.all = IndexedSet()
+        self.revealed = IndexedSet()
+        self.groups = {}
+        self.revealed_groups = {}
+        self._group_of = {}
+        self._built = True
+        for filename in catalog.characters:
+            self.on_add(filename)
+
+    def on_change(self, store: str, key: str, record: Optional[CharacterStats]) -> None:
+        if store != "character_stats" or not self._built:
+            return
+        filename = catalog.characters.by_name.get(key)
+        if filename is not None:
+            self._place(filename, record)
+
+    def on_add(self, filename: str) -> None:
+        if not self._built:
+            return
+        self.all.add(filename)
+        self._place(filename, storage.peek_character_stats(canonical_name(filename)))
+
+    def on_discard(self, filename: str) -> None:
+        if not self._built:
+            return
+        self.all.discard(filename)
+        self._place(filename, None)
+
+    def pool(self, revealed_only: bool = True, group: Optional[str] = None) -> IndexedSet[str]:
+        """Get the set of files a roll draws from, optionally limited to one group."""
+        catalog.characters.ensure_fresh()
+        self._ensure_built()
+        if group is not None:
+            groups = self.revealed_groups if revealed_only else self.groups
+            return groups.get(group, IndexedSet())
+        return self.revealed if revealed_only else self.all
+
+# Global pool instance
+character_pool = CharacterPool()
+storage.add_listener(character_pool)
+catalog.characters.add_listener(character_pool)
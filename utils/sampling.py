@@ -0,0 +1,121 @@
+import random
+from typing import Callable, Dict, Generic, List, Optional, Sequence, TypeVar
+
+from config.config import RARITY_WEIGHTS, CHARACTER_WEIGHTS, TOOL_WEIGHTS, BOSS_WEIGHTS
+from data.storage import storage
+from utils.assets import AssetDirectory, catalog, canonical_name, display_name
+
+T = TypeVar('T')
+
+class AliasTable(Generic[T]):
+    """Walker/Vose alias table: O(n) to build, O(1) per weighted draw."""
+
+    def __init__(self, items: Sequence[T], weights: Sequence[float]):
+        if len(items) != len(weights):
+            raise ValueError("Need one weight per item")
+        total = float(sum(weights))
+        if not items or total <= 0:
+            raise ValueError("Need at least one item with a positive weight")
+        n = len(items)
+        self.items = list(items)
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Whatever is left is 1 up to rounding error
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def draw(self) -> T:
+        """Get one weighted random item."""
+        i = random.randrange(len(self.items))
+        return self.items[i] if random.random() < self.prob[i] else self.items[self.alias[i]]
+
+    def sample(self, n: int) -> List[T]:
+        """Get n independent weighted random items."""
+        items, prob, alias, size = self.items, self.prob, self.alias, len(self.items)
+        draws = []
+        for _ in range(n):
+            i = random.randrange(size)
+            draws.append(items[i] if random.random() < prob[i] else items[alias[i]])
+        return draws
+
+class WeightedPool:
+    """
+    Alias table over the files of one asset folder.
+
+    weight(filename) gives each file's odds; 0 leaves it out. The table
+    is rebuilt on the next draw after the folder changes or, if store is
+    set, after a record of that store starts or stops making a file
+    eligible (e.g. a tool getting its stats).
+    """
+
+    def __init__(self, directory: AssetDirectory, weight: Callable[[str], float], store: Optional[str] = None):
+        self.directory = directory
+        self.weight = weight
+        self.store = store
+        self._table: Optional[AliasTable[str]] = None
+        self._weighted: Dict[str, float] = {}
+        directory.add_listener(self)
+        if store is not None:
+            storage.add_listener(self)
+
+    def invalidate(self) -> None:
+        self._table = None
+
+    def on_add(self, filename: str) -> None:
+        self.invalidate()
+
+    def on_discard(self, filename: str) -> None:
+        self.invalidate()
+
+    def on_load(self, storage) -> None:
+        self.invalidate()
+
+    def on_change(self, store: str, key: str, record: Optional[object]) -> None:
+        if store != self.store or self._table is None:
+            return
+        filename = self.directory.by_name.get(canonical_name(key))
+        if filename is not None and self.weight(filename) != self._weighted.get(filename, 0.0):
+            self.invalidate()
+
+    def table(self) -> AliasTable[str]:
+        self.directory.ensure_fresh()
+        if self._table is None:
+            weights = {filename: self.weight(filename) for filename in self.directory}
+            self._weighted = {filename: w for filename, w in weights.items() if w > 0}
+            if not self._weighted:
+                raise FileNotFoundError(f"No eligible files in {self.directory.path}")
+            self._table = AliasTable(list(self._weighted), list(self._weighted.values()))
+        return self._table
+
+    def draw(self) -> str:
+        """Get one weighted random filename."""
+        return self.table().draw()
+
+    def sample(self, n: int) -> List[str]:
+        """Get n independent weighted random filenames."""
+        return self.table().sample(n)
+
+def _tool_weight(filename: str) -> float:
+    name = display_name(filename)
+    return TOOL_WEIGHTS.get(name, 1.0) if name in storage.tool_stats else 0.0
+
+def _boss_weight(filename: str) -> float:
+    name = display_name(filename)
+    stats = storage.peek_boss_stats(name)
+    return BOSS_WEIGHTS.get(name, 1.0) if stats is not None and stats.times_defeated >= 0 else 0.0
+
+# Global tables
+rarity = AliasTable(list(RARITY_WEIGHTS), list(RARITY_WEIGHTS.values()))
+characters = WeightedPool(catalog.characters, lambda filename: CHARACTER_WEIGHTS.get(canonical_name(filename), 1.0))
+tools = WeightedPool(catalog.items, _tool_weight, store="tool_stats")
+bosses = WeightedPool(catalog.bosses, _boss_weight, store="boss_stats")
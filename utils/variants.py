@@ -0,0 +1,171 @@
+import asyncio
+import io
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from config.config import (
+    VARIANTS_DIR,
+    THUMBNAIL_SIZE,
+    FULL_IMAGE_SIZE,
+    JPEG_QUALITY
+)
+from utils.assets import catalog, content_hash
+
+try:
+    from PIL import Image, ImageSequence
+except ImportError:  # Pillow is optional; without it every asset is sent as submitted
+    Image = None
+
+# Variant kind -> longest side in pixels
+VARIANT_SIZES: Dict[str, int] = {
+    "thumb": THUMBNAIL_SIZE,
+    "full": FULL_IMAGE_SIZE
+}
+
+def _has_alpha(image: "Image.Image") -> bool:
+    return image.mode in ("RGBA", "LA", "P") and (image.mode != "P" or "transparency" in image.info)
+
+def _encode_still(image: "Image.Image", size: int) -> Tuple[bytes, str]:
+    """Shrink one frame to fit size and encode it as PNG (with alpha) or JPEG."""
+    image = image.copy()
+    image.thumbnail((size, size))
+    out = io.BytesIO()
+    if _has_alpha(image):
+        image.convert("RGBA").save(out, "PNG", optimize=True)
+        return out.getvalue(), ".png"
+    image.convert("RGB").save(out, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    return out.getvalue(), ".jpg"
+
+def _encode_animation(image: "Image.Image", size: int) -> Tuple[bytes, str]:
+    """Shrink every frame of an animated GIF to fit size."""
+    frames = []
+    for frame in ImageSequence.Iterator(image):
+        frame = frame.convert("RGBA")
+        frame.thumbnail((size, size))
+        frames.append(frame)
+    out = io.BytesIO()
+    frames[0].save(
+        out,
+        "GIF",
+        save_all=True,
+        append_images=frames[1:],
+        loop=image.info.get("loop", 0),
+        duration=image.info.get("duration", 100),
+        disposal=2,
+        optimize=True
+    )
+    return out.getvalue(), ".gif"
+
+def render_variant(source: Union[str, Path], kind: str) -> Optional[Tuple[bytes, str]]:
+    """
+    Render one variant of an image as (bytes, extension).
+
+    "thumb" is a still (the first frame, for GIFs); "full" keeps GIFs
+    animated. Returns None without Pillow.
+    """
+    if Image is None:
+        return None
+    size = VARIANT_SIZES[kind]
+    with Image.open(source) as image:
+        if kind == "full" and getattr(image, "is_animated", False):
+            return _encode_animation(image, size)
+        image.seek(0)
+        return _encode_still(image, size)
+
+class VariantCache:
+    """
+    Size-bounded copies of the assets, stored under VARIANTS_DIR by content hash.
+
+    A variant file is only kept if it is smaller than its source, so
+    select() falls back to the original otherwise (and always without
+    Pillow or before the variants are built).
+    """
+
+    def __init__(self, root: Path = VARIANTS_DIR):
+        self.root = Path(root)
+        self._selected: Dict[Tuple[str, str], Path] = {}
+
+    def _stem(self, digest: str, kind: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.{kind}{VARIANT_SIZES[kind]}"
+
+    def _find(self, digest: str, kind: str) -> Optional[Path]:
+        stem = self._stem(digest, kind)
+        for ext in (".png", ".jpg", ".gif"):
+            path = stem.with_name(stem.name + ext)
+            if path.exists():
+                return path
+        return None
+
+    def build(self, source: Union[str, Path], kinds: Tuple[str, ...] = tuple(VARIANT_SIZES)) -> List[Path]:
+        """Write any missing variants of one image. Returns the variants that exist afterwards."""
+        source = Path(source)
+        digest = content_hash(source)
+        built = []
+        for kind in kinds:
+            existing = self._find(digest, kind)
+            if existing is not None:
+                built.append(existing)
+                continue
+            rendered = render_variant(source, kind)
+            if rendered is None or len(rendered[0]) >= os.path.getsize(source):
+                continue
+            data, ext = rendered
+            stem = self._stem(digest, kind)
+            path = stem.with_name(stem.name + ext)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+            self._selected.pop((digest, kind), None)
+            built.append(path)
+        return built
+
+    def forget(self, digest: str) -> None:
+        """Drop what was selected for an image's content, e.g. once the file is deleted."""
+        for kind in VARIANT_SIZES:
+            self._selected.pop((digest, kind), None)
+
+    def build_soon(self, source: Union[str, Path]) -> None:
+        """Build an image's variants on a worker thread, e.g. right after /submit saved it."""
+        if Image is None:
+            return
+        asyncio.get_running_loop().run_in_executor(None, self._build_logged, Path(source))
+
+    def _build_logged(self, source: Path) -> None:
+        try:
+            self.build(source)
+        except Exception as e:
+            print(f"Failed to build image variants for {source}: {e}")
+
+    def build_all(self) -> int:
+        """Build the variants of every asset in the catalog. Returns the number of images processed."""
+        count = 0
+        for directory in catalog.directories():
+            for filename in directory:
+                self.build(directory.path / filename)
+                count += 1
+        return count
+
+    def resolve(self, source: Union[str, Path], kind: str = "full") -> Tuple[Path, str]:
+        """
+        Get the path to send for an image (its variant if one was built,
+        else the image itself) and the content hash of the source. This
+        stats the source once; variants are named by that hash, so they
+        never need checking themselves.
+        """
+        source = Path(source)
+        digest = content_hash(source)
+        if Image is None:
+            return source, digest
+        selected = self._selected.get((digest, kind))
+        if selected is None:
+            selected = self._selected[(digest, kind)] = self._find(digest, kind) or source
+        return selected, digest
+
+    def select(self, source: Union[str, Path], kind: str = "full") -> Path:
+        """Get the path to send for an image: its variant if one was built, else the image itself."""
+        return self.resolve(source, kind)[0]
+
+# Global variant cache instance
+variants = VariantCache()